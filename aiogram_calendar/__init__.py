@@ -1,5 +1,71 @@
 # flake8: noqa
-from aiogram_calendar.common import get_user_locale
-from aiogram_calendar.simple_calendar import SimpleCalendar
-from aiogram_calendar.dialog_calendar import DialogCalendar
-from aiogram_calendar.schemas import SimpleCalendarCallback, DialogCalendarCallback, CalendarLabels
+"""Exports are imported on first access, so `import aiogram_calendar` does not load aiogram & pydantic
+
+Modules which need only the date helpers (rules, grid) stay cheap to import.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# exported name -> submodule it is defined in
+_EXPORTS = {
+    'get_user_locale': 'common',
+    'get_user_language': 'common',
+    'SimpleCalendar': 'simple_calendar',
+    'DialogCalendar': 'dialog_calendar',
+    'SimpleCalendarCallback': 'schemas',
+    'DialogCalendarCallback': 'schemas',
+    'CalendarLabels': 'schemas',
+    'RenderCache': 'cache',
+    'Clock': 'clock',
+    'FixedClock': 'clock',
+    'MarkupFingerprints': 'fingerprints',
+    'EditCoalescer': 'coalescer',
+    'CallbackTimings': 'timings',
+    'ApiScheduler': 'scheduler',
+    'CalendarMetrics': 'metrics',
+    'PackedMarkup': 'markup',
+    'PackedMarkupMiddleware': 'markup',
+    'CalendarCallbackFilter': 'compact',
+    'simple_codec': 'compact',
+    'dialog_codec': 'compact',
+    'DateRules': 'rules',
+    'CalendarRegistry': 'registry',
+    'get_calendar': 'registry',
+    'Recipient': 'bulk',
+    'render_many': 'bulk',
+    'broadcast': 'bulk',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value     # next access does not go through __getattr__
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from aiogram_calendar.common import get_user_locale, get_user_language
+    from aiogram_calendar.simple_calendar import SimpleCalendar
+    from aiogram_calendar.dialog_calendar import DialogCalendar
+    from aiogram_calendar.schemas import SimpleCalendarCallback, DialogCalendarCallback, CalendarLabels
+    from aiogram_calendar.cache import RenderCache
+    from aiogram_calendar.clock import Clock, FixedClock
+    from aiogram_calendar.fingerprints import MarkupFingerprints
+    from aiogram_calendar.coalescer import EditCoalescer
+    from aiogram_calendar.timings import CallbackTimings
+    from aiogram_calendar.scheduler import ApiScheduler
+    from aiogram_calendar.metrics import CalendarMetrics
+    from aiogram_calendar.markup import PackedMarkup, PackedMarkupMiddleware
+    from aiogram_calendar.compact import CalendarCallbackFilter, simple_codec, dialog_codec
+    from aiogram_calendar.rules import DateRules
+    from aiogram_calendar.registry import CalendarRegistry, get_calendar
+    from aiogram_calendar.bulk import Recipient, render_many, broadcast
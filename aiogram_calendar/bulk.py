@@ -0,0 +1,129 @@
+import asyncio
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Type, Union
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup
+
+from .clock import TimeZone
+from .localization import resolve_language
+from .registry import CalendarRegistry, CalendarType, default_registry
+from .scheduler import ApiScheduler, NAVIGATION
+
+
+class Recipient(NamedTuple):
+    """Chat a calendar is sent to and the calendar it gets, None stands for calendar defaults"""
+    chat_id: int
+    locale: str = None
+    year: int = None
+    month: int = None
+    min_date: datetime = None
+    max_date: datetime = None
+    tz: TimeZone = None
+
+
+class BroadcastResult(NamedTuple):
+    sent: int
+    failed: Dict[int, Exception]    # chat_id -> last error sending to it, a chat listed twice may fail twice
+    groups: int                     # distinct keyboards rendered
+
+
+def group_key(recipient: Recipient, today: date) -> tuple:
+    """Recipients with equal keys get the same keyboard
+
+    Time zone only decides today's date, so recipients of all zones where it is the same day share a group.
+    """
+    return recipient.year, recipient.month, recipient.min_date, recipient.max_date, today
+
+
+async def render_many(
+    calendar_cls: Type[CalendarType],
+    recipients: Iterable[Recipient],
+    registry: CalendarRegistry = default_registry,
+    **options
+) -> List[InlineKeyboardMarkup]:
+    """Renders keyboards of recipients, one per group of (locale, month, range, local date)
+
+    Parameters:
+    calendar_cls (type): SimpleCalendar or DialogCalendar
+    recipients (iterable): recipients to render keyboards for
+    registry (CalendarRegistry): registry of shared calendars, calendars are created with options
+
+    Returns keyboards in order of recipients, recipients of a group share the same keyboard object.
+    """
+    rendered = {}
+    markups = []
+    for recipient in recipients:
+        language = resolve_language(recipient.locale)
+        calendar = registry.get(calendar_cls, locale=language, **options)
+        key = (language, *group_key(recipient, calendar._today(recipient.tz)))
+        markup = rendered.get(key)
+        if markup is None:
+            markup = rendered[key] = await calendar.start_calendar(
+                year=recipient.year, month=recipient.month,
+                min_date=recipient.min_date, max_date=recipient.max_date, tz=recipient.tz
+            )
+        markups.append(markup)
+    return markups
+
+
+async def broadcast(
+    bot: Bot,
+    calendar_cls: Type[CalendarType],
+    recipients: Iterable[Recipient],
+    text: Union[str, Callable[[Recipient], str]],
+    concurrency: int = 20,
+    scheduler: ApiScheduler = None,
+    registry: CalendarRegistry = default_registry,
+    **options
+) -> BroadcastResult:
+    """Sends message with calendar to every recipient
+
+    Keyboards are rendered once per group with render_many(), then concurrency workers send them
+    one recipient after another, through scheduler if given. A failure of one chat does not stop the others.
+
+    Parameters:
+    bot (Bot): bot sending messages
+    calendar_cls (type): SimpleCalendar or DialogCalendar
+    recipients (iterable): chats and their calendars
+    text (str): message text, or callable returning text for a recipient
+    concurrency (int): maximum number of requests in flight
+    scheduler (ApiScheduler): keeps sending within rate limits
+    registry (CalendarRegistry): registry of shared calendars, calendars are created with options
+
+    Usage:
+        result = await broadcast(bot, SimpleCalendar, recipients, 'Pick your appointment date', packed=True)
+        logger.info('sent %s, failed %s', result.sent, list(result.failed))
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be positive')
+    recipients = list(recipients)
+    markups = await render_many(calendar_cls, recipients, registry, **options)
+    pending = iter(zip(recipients, markups))    # shared by workers, each takes the next recipient
+    failed = {}
+    failures = 0
+
+    async def send(recipient: Recipient, markup: InlineKeyboardMarkup) -> None:
+        message_text = text(recipient) if callable(text) else text
+
+        def make_call():
+            return bot.send_message(chat_id=recipient.chat_id, text=message_text, reply_markup=markup)
+
+        if scheduler is None:
+            await make_call()
+        else:
+            await scheduler.call(recipient.chat_id, make_call, NAVIGATION)
+
+    async def worker() -> None:
+        nonlocal failures
+        for recipient, markup in pending:
+            try:
+                await send(recipient, markup)
+            except Exception as error:
+                failed[recipient.chat_id] = error
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(recipients)))))
+    return BroadcastResult(
+        sent=len(recipients) - failures, failed=failed, groups=len({id(markup) for markup in markups})
+    )
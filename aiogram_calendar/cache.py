@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+
+
+def key_day(key: Hashable) -> Optional[date]:
+    """Day keyboard was rendered for, calendars put it last in their keys"""
+    if isinstance(key, tuple) and key and isinstance(key[-1], date):
+        return key[-1]
+    return None
+
+
+class RenderCache:
+    """Bounded LRU cache for rendered calendar keyboards
+
+    One instance can be shared by any number of calendars, the key passed by a calendar
+    covers everything the keyboard depends on (calendar type, labels, period, dates range, today).
+    Keyboards of past days are dropped by roll_over() when calendars' clock passes midnight.
+    Safe to share between threads rendering with render_calendar().
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Parameters:
+        maxsize (int): maximum number of keyboards kept, least recently used are evicted first
+        ttl (float): seconds an entry stays valid, if None - entries never expire
+        on_evict (callable): called with (key, value) for every entry dropped by size, ttl or invalidate()
+        timer (callable): monotonic clock used for ttl checks
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._timer = timer
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.day = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: tuple) -> bool:
+        return self.ttl is not None and self._timer() - entry[1] > self.ttl
+
+    def _evict(self, key: Hashable) -> None:
+        value, _ = self._data.pop(key)
+        self.evictions += 1
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns cached value and marks it as recently used, counts hit or miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self._expired(entry):
+                self._evict(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Stores value under key evicting least recently used entries over maxsize, returns value"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, self._timer())
+            while len(self._data) > self.maxsize:
+                self._evict(next(iter(self._data)))
+            return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drops entries which keys match predicate (all entries if None), returns number of dropped"""
+        with self._lock:
+            keys = [key for key in self._data if predicate is None or predicate(key)]
+            for key in keys:
+                self._evict(key)
+            return len(keys)
+
+    def roll_over(self, today: date) -> int:
+        """Drops keyboards rendered before today once per day, returns number of dropped"""
+        if self.day is not None and today <= self.day:
+            return 0
+        with self._lock:
+            if self.day is not None and today <= self.day:
+                return 0
+            self.day = today
+            return self.invalidate(lambda key: key_day(key) is not None and key_day(key) < today)
+
+    def clear(self) -> None:
+        """Drops all entries and resets counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,253 @@
+import argparse
+import gettext
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+LOCALES_DIR = Path(__file__).parent / 'locales'
+COMPILED_NAME = 'catalog.bin'
+SOURCE_SUFFIXES = ('.json', '.mo')
+
+# compiled catalog layout, all numbers are little endian:
+#   header  MAGIC, version, number of languages
+#   index   per language: code length, code, offset & size of its entries
+#   entries per key: kind, key length, value length, key, value; list items are joined with LIST_SEPARATOR
+MAGIC = b'ACAL'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+INDEX_ENTRY = struct.Struct('<II')
+ENTRY = struct.Struct('<BHI')
+KIND_TEXT, KIND_LIST = 0, 1
+LIST_SEPARATOR = '\x1f'
+
+# list keys and their sizes, gettext packs keep list items as `months.1`...`months.12` messages
+LIST_KEYS = {'months': 12, 'days': 7}
+
+Translations = Dict[str, Union[str, list]]
+
+
+def validate(language: str, translations: Translations) -> Translations:
+    """Checks list keys of locale pack have expected sizes, returns translations"""
+    for key, size in LIST_KEYS.items():
+        value = translations.get(key)
+        if value is not None and (not isinstance(value, list) or len(value) != size):
+            raise ValueError(f'Locale pack {language!r} must have {size} items in {key!r}')
+    return translations
+
+
+def load_json(path: Union[str, Path]) -> Translations:
+    with open(path, encoding='utf-8') as file:
+        return validate(Path(path).stem, json.load(file))
+
+
+def load_gettext(path: Union[str, Path]) -> Translations:
+    """Loads compiled gettext pack, msgid is a key, list items have msgids like `months.1`"""
+    with open(path, 'rb') as file:
+        catalog = gettext.GNUTranslations(file)._catalog
+    translations = {}
+    lists = {key: [None] * size for key, size in LIST_KEYS.items()}
+    for msgid, text in catalog.items():
+        if not msgid or not isinstance(msgid, str):
+            continue    # header & plural forms
+        key, _, number = msgid.partition('.')
+        if key in lists and number.isdigit() and 1 <= int(number) <= LIST_KEYS[key]:
+            lists[key][int(number) - 1] = text
+        else:
+            translations[msgid] = text
+    for key, items in lists.items():
+        if any(item is not None for item in items):
+            if None in items:
+                raise ValueError(f'Locale pack {Path(path).stem!r} misses items of {key!r}')
+            translations[key] = items
+    return validate(Path(path).stem, translations)
+
+
+LOADERS = {'.json': load_json, '.mo': load_gettext}
+
+
+def load_pack(path: Union[str, Path]) -> Translations:
+    path = Path(path)
+    return LOADERS[path.suffix](path)
+
+
+def compile_catalog(packs: Dict[str, Translations], output: Union[str, Path]) -> Path:
+    """Writes locale packs into a binary catalog read by BinaryCatalog"""
+    index = []
+    entries = bytearray()
+    for language in sorted(packs):
+        offset = len(entries)
+        for key, value in packs[language].items():
+            if isinstance(value, list):
+                kind, value = KIND_LIST, LIST_SEPARATOR.join(value)
+            else:
+                kind = KIND_TEXT
+            key_bytes, value_bytes = key.encode(), value.encode()
+            entries += ENTRY.pack(kind, len(key_bytes), len(value_bytes)) + key_bytes + value_bytes
+        index.append((language.encode(), offset, len(entries) - offset))
+
+    header = bytearray(HEADER.pack(MAGIC, VERSION, len(index)))
+    index_size = sum(1 + len(code) + INDEX_ENTRY.size for code, _, _ in index)
+    base = len(header) + index_size
+    for code, offset, size in index:
+        header += bytes([len(code)]) + code + INDEX_ENTRY.pack(base + offset, size)
+
+    output = Path(output)
+    output.write_bytes(bytes(header) + bytes(entries))
+    return output
+
+
+def compile_directory(source: Union[str, Path], output: Union[str, Path] = None) -> Path:
+    """Compiles all JSON & gettext packs of source directory, to catalog.bin inside of it by default"""
+    source = Path(source)
+    packs = {path.stem: load_pack(path) for path in sorted(source.iterdir()) if path.suffix in SOURCE_SUFFIXES}
+    return compile_catalog(packs, output or source / COMPILED_NAME)
+
+
+class BinaryCatalog:
+    """Memory-mapped compiled catalog, only the index is read on open, packs are decoded on first use"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path, 'rb') as file:
+            self.mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.path} is not a locale catalog of version {VERSION}')
+        self._index = {}
+        position = HEADER.size
+        for _ in range(count):
+            length = self._map[position]
+            code = self._map[position + 1:position + 1 + length].decode()
+            position += 1 + length
+            self._index[code] = INDEX_ENTRY.unpack_from(self._map, position)
+            position += INDEX_ENTRY.size
+
+    def __contains__(self, language: str) -> bool:
+        return language in self._index
+
+    def languages(self) -> list:
+        return list(self._index)
+
+    def load(self, language: str) -> Translations:
+        offset, size = self._index[language]
+        translations = {}
+        position, end = offset, offset + size
+        while position < end:
+            kind, key_length, value_length = ENTRY.unpack_from(self._map, position)
+            position += ENTRY.size
+            key = self._map[position:position + key_length].decode()
+            position += key_length
+            value = self._map[position:position + value_length].decode()
+            position += value_length
+            translations[key] = value.split(LIST_SEPARATOR) if kind == KIND_LIST else value
+        return translations
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class LocaleCatalog:
+    """Locale packs found in directories, loaded on first use and cached per process
+
+    Directories are listed on first lookup, packs are parsed only when a language is requested.
+    A compiled catalog.bin is preferred over JSON & gettext sources of the same directory unless
+    any of them was changed after it was compiled, directories added later take precedence over earlier ones.
+    """
+
+    def __init__(self, paths: Iterable[Union[str, Path]] = ()) -> None:
+        self._paths = [Path(path) for path in paths]
+        self._sources = None
+        self._binaries: Dict[Path, BinaryCatalog] = {}     # catalog.bin path -> its open catalog
+        self._registered = {}
+        self._loaded = {}
+
+    def add_path(self, path: Union[str, Path]) -> None:
+        self._paths.append(Path(path))
+        self._sources = None
+        self._loaded.clear()
+
+    def register(self, language: str, translations: Translations) -> None:
+        """Adds locale pack from memory, overrides packs found in directories"""
+        self._registered[language] = validate(language, translations)
+        self._loaded.pop(language, None)
+
+    def _scan(self) -> dict:
+        if self._sources is None:
+            sources = {}
+            opened, self._binaries = self._binaries, {}
+            for path in reversed(self._paths):
+                if not path.is_dir():
+                    continue
+                files = [source for source in sorted(path.iterdir()) if source.suffix in SOURCE_SUFFIXES]
+                binary = self._open_compiled(path / COMPILED_NAME, files, opened)
+                if binary is not None:
+                    for language in binary.languages():
+                        sources.setdefault(language, binary)
+                for source in files:
+                    sources.setdefault(source.stem, source)
+            for binary in opened.values():     # catalogs not used anymore
+                binary.close()
+            self._sources = sources
+        return self._sources
+
+    def _open_compiled(self, compiled: Path, files: list, opened: dict) -> Optional[BinaryCatalog]:
+        """Catalog compiled from files, None if there is none or it is older than any of them
+
+        Catalogs opened by the previous scan are reused, one recompiled since is opened again.
+        """
+        if compiled in self._binaries:     # directory is added twice
+            return self._binaries[compiled]
+        binary = opened.pop(compiled, None)
+        mtime_ns = compiled.stat().st_mtime_ns if compiled.is_file() else None
+        if binary is not None and binary.mtime_ns != mtime_ns:
+            binary.close()
+            binary = None
+        if mtime_ns is None or any(source.stat().st_mtime_ns > mtime_ns for source in files):
+            if binary is not None:
+                binary.close()
+            return None
+        if binary is None:
+            binary = BinaryCatalog(compiled)
+        self._binaries[compiled] = binary
+        return binary
+
+    def __contains__(self, language: str) -> bool:
+        return language in self._registered or language in self._scan()
+
+    def languages(self) -> list:
+        return sorted(set(self._registered) | set(self._scan()))
+
+    def load(self, language: str) -> Optional[Translations]:
+        """Returns locale pack of language or None when there is no such pack"""
+        if language in self._registered:
+            return self._registered[language]
+        translations = self._loaded.get(language)
+        if translations is None:
+            source = self._scan().get(language)
+            if source is None:
+                return None
+            if isinstance(source, BinaryCatalog):
+                translations = source.load(language)
+            else:
+                translations = load_pack(source)
+            self._loaded[language] = translations
+        return translations
+
+
+default_catalog = LocaleCatalog([LOCALES_DIR])
+
+
+def main(args: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Compile JSON & gettext locale packs into a binary catalog')
+    parser.add_argument('source', nargs='?', default=str(LOCALES_DIR), help='directory with locale packs')
+    parser.add_argument('-o', '--output', help=f'catalog path, defaults to {COMPILED_NAME} in source directory')
+    options = parser.parse_args(args)
+    print(compile_directory(options.source, options.output))
+
+
+if __name__ == '__main__':
+    main()
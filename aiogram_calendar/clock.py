@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional, Union
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:     # python 3.8
+    from backports.zoneinfo import ZoneInfo
+
+# the westernmost time zone is UTC-12, no one has a date earlier than the date there
+WESTERNMOST_OFFSET = timedelta(hours=12)
+
+TimeZone = Union[str, tzinfo, None]
+
+
+@lru_cache(maxsize=1024)
+def get_zone(name: str) -> tzinfo:
+    """Returns ZoneInfo of IANA zone name like 'Europe/Kyiv', one object per name"""
+    return ZoneInfo(name)
+
+
+def resolve_zone(tz: TimeZone) -> Optional[tzinfo]:
+    """Accepts zone name or tzinfo, None stands for server local time"""
+    if isinstance(tz, str):
+        return get_zone(tz)
+    return tz
+
+
+class Clock:
+    """Source of current time for calendars
+
+    Calendars ask it once per request, so all parts of a keyboard agree on today,
+    and the date it returns drives expiry of cached keyboards at midnight.
+    """
+
+    def now(self, tz: tzinfo = None) -> datetime:
+        return datetime.now(tz)
+
+    def today(self, tz: tzinfo = None) -> date:
+        """Today's date in time zone tz, server local date if None"""
+        return self.now(tz).date()
+
+    def earliest_today(self) -> date:
+        """Today's date in the westernmost time zone, keyboards of earlier days are shown to no one"""
+        return (self.now(timezone.utc) - WESTERNMOST_OFFSET).date()
+
+
+class FixedClock(Clock):
+    """Clock standing still until moved, makes highlighted keyboards deterministic in tests
+
+    Naive time is taken as server local time like datetime.astimezone() does.
+
+    Usage:
+        clock = FixedClock(datetime(2024, 12, 31, 23, 59, tzinfo=timezone.utc))
+        calendar = SimpleCalendar(clock=clock)
+        clock.advance(minutes=1)
+    """
+
+    def __init__(self, now: datetime) -> None:
+        self._now = now
+
+    def now(self, tz: tzinfo = None) -> datetime:
+        if tz is None:
+            return self._now
+        return self._now.astimezone(tz)
+
+    def set(self, now: datetime) -> None:
+        self._now = now
+
+    def advance(self, **delta) -> None:
+        """Moves clock forward, accepts timedelta arguments"""
+        self._now += timedelta(**delta)
+
+
+system_clock = Clock()
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class _Slot:
+    __slots__ = ('lock', 'ticket', 'users', 'finalized')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.ticket = 0
+        self.users = 0
+        self.finalized = False      # a final edit was requested, later ones are dropped
+
+
+class EditCoalescer:
+    """Serializes keyboard edits per message and drops the ones superseded while waiting
+
+    The edit in flight always completes, of the edits requested meanwhile only the latest is sent,
+    so a burst of taps costs at most two Bot API calls and keyboards never arrive out of order.
+    Once a final edit is requested, the keyboard is not attached back by edits requested after it.
+    One instance is shared by all calendars of a bot, messages are keyed by (chat_id, message_id).
+    """
+
+    def __init__(self) -> None:
+        self._slots = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Number of messages with edits in flight"""
+        return len(self._slots)
+
+    async def submit(self, key: Hashable, send: Callable[[], Awaitable], final: bool = False) -> bool:
+        """Runs send after edits of the message requested earlier
+
+        Parameters:
+        key (hashable): message key, (chat_id, message_id)
+        send (callable): coroutine function doing the edit
+        final (bool): never drop this edit, e.g. removing keyboard after date is selected
+
+        Returns False without calling send if a later edit was requested while this one waited
+        or a final edit was requested before it.
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        if not final and slot.finalized:
+            self.dropped += 1
+            return False
+        slot.ticket += 1
+        ticket = slot.ticket
+        slot.finalized = slot.finalized or final
+        slot.users += 1
+        try:
+            async with slot.lock:
+                if not final and (ticket != slot.ticket or slot.finalized):
+                    self.dropped += 1
+                    return False
+                await send()
+                self.sent += 1
+                return True
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                del self._slots[key]
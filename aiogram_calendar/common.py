@@ -1,16 +1,48 @@
-import calendar
-import locale
+import asyncio
+import inspect
+from functools import lru_cache
+from locale import locale_alias
+from time import perf_counter
+from typing import Callable, Optional
 
-from aiogram.types import User
-from datetime import datetime
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import User, InlineKeyboardMarkup
+from datetime import date, datetime
+
+from .schemas import CalendarLabels, FrozenCalendarLabels
+from .localization import Localization, resolve_language
+from .cache import RenderCache
+from .clock import Clock, TimeZone, resolve_zone, system_clock
+from .fingerprints import MarkupFingerprints, markup_fingerprint, message_key
+from .coalescer import EditCoalescer
+from .timings import CallbackTimings
+from .metrics import CalendarMetrics
+from .scheduler import ApiScheduler, ANSWER, FINAL, NAVIGATION
+from .markup import PackedMarkup
+from .templates import RenderedKeyboard, copy_markup, to_markup
+from .rules import DateRules, days_in_month, range_mask
+
+
+@lru_cache(maxsize=1024)
+def _resolve_locale(code: Optional[str]) -> str:
+    language = resolve_language(code)
+    alias = locale_alias.get((code or '').split('.')[0].replace('-', '_').lower())
+    alias = alias or locale_alias.get(language.replace('-', '_'))
+    return alias.split(".")[0] if alias else language
 
-from .schemas import CalendarLabels
-from .localization import Localization
 
 async def get_user_locale(from_user: User) -> str:
-    "Returns user locale in format en_US, accepts User instance from Message, CallbackData etc"
-    loc = from_user.language_code
-    return locale.locale_alias[loc].split(".")[0]
+    """Returns user locale in format en_US, accepts User instance from Message, CallbackData etc
+
+    Codes unknown to the locale module give the calendar language of the user alone (kk), see get_user_language().
+    Results are memoized per code.
+    """
+    return _resolve_locale(from_user.language_code)
+
+
+async def get_user_language(from_user: User) -> str:
+    "Returns calendar language for user (en, ru...), accepts User instance from Message, CallbackData etc"
+    return resolve_language(from_user.language_code)
 
 
 class BaseCalendar:
@@ -25,7 +57,20 @@ class GenericCalendar(BaseCalendar):
         locale: str = None,
         cancel_btn: str = None,
         today_btn: str = None,
-        show_alerts: bool = False
+        show_alerts: bool = False,
+        cache: RenderCache = None,
+        packed: bool = False,
+        compact: bool = False,
+        rules: DateRules = None,
+        first_weekday: int = 0,
+        clock: Clock = None,
+        tz: TimeZone = None,
+        fingerprints: MarkupFingerprints = None,
+        coalescer: EditCoalescer = None,
+        ack_first: bool = False,
+        timings: CallbackTimings = None,
+        scheduler: ApiScheduler = None,
+        metrics: CalendarMetrics = None
     ) -> None:
         """Pass labels if you need to have alternative language of buttons
 
@@ -34,13 +79,23 @@ class GenericCalendar(BaseCalendar):
         cancel_btn (str): label for button Cancel to cancel date input
         today_btn (str): label for button Today to set calendar back to todays date
         show_alerts (bool): defines how the date range error would shown (defaults to False)
+        cache (RenderCache): cache for rendered keyboards, can be shared between calendars (defaults to None - no caching)
+        packed (bool): return PackedMarkup with pre-serialized JSON instead of validated InlineKeyboardMarkup
+        compact (bool): pack callbacks in compact format, handle them with CalendarCallbackFilter
+        rules (DateRules): rules disabling dates in addition to the dates range
+        first_weekday (int): day of week calendar weeks start with, 0 is Monday (default), 6 is Sunday
+        clock (Clock): source of today's date, defaults to system clock
+        tz (str): user's time zone like 'Europe/Kyiv' today is highlighted in, if None - server local time
+        fingerprints (MarkupFingerprints): store of keyboards shown per message, edits not changing them are skipped
+        coalescer (EditCoalescer): serializes edits per message sending only the latest of a burst of taps
+        ack_first (bool): answer navigation callbacks concurrently with rendering & editing, stops client spinner early
+        timings (CallbackTimings): recorder of ack & edit timings of navigation callbacks in ack_first mode
+        scheduler (ApiScheduler): keeps Bot API calls within rate limits, confirms selected dates first
+        metrics (CalendarMetrics): registry of action, render, rejection & cache metrics (defaults to None - off)
         """
         super().__init__(locale)
-        self._labels = CalendarLabels()
-        
         # Используем переводы из локализации
-        self._labels.days_of_week = self.locale.TRANSLATIONS[self.locale.language]['days']
-        self._labels.months = self.locale.TRANSLATIONS[self.locale.language]['months']
+        self._labels = CalendarLabels.for_language(self.locale.language)
 
         if cancel_btn:
             self._labels.cancel_caption = cancel_btn
@@ -48,28 +103,236 @@ class GenericCalendar(BaseCalendar):
             self._labels.today_caption = today_btn
 
         self.show_alerts = show_alerts
+        self.cache = cache
+        self.packed = packed
+        self.compact = compact
+        self.rules = rules
+        if not 0 <= first_weekday <= 6:
+            raise ValueError('first_weekday must be in range 0..6')
+        self.first_weekday = first_weekday
+        self.clock = clock or system_clock
+        self.tz = resolve_zone(tz)
+        self.fingerprints = fingerprints
+        self.coalescer = coalescer
+        self.ack_first = ack_first
+        self.timings = timings
+        self.scheduler = scheduler
+        self.metrics = metrics
         self.min_date = None
         self.max_date = None
+        self.frozen = False
+        self._frozen_labels_key = None
+
+    def freeze(self) -> 'GenericCalendar':
+        """Makes calendar safe to share between concurrent handlers
+
+        Attributes and labels can not be changed after that and set_dates_range() is forbidden,
+        dates range is passed to start_calendar() and process_selection() per call instead.
+        """
+        self._labels = FrozenCalendarLabels(**self._labels.model_dump())
+        self._frozen_labels_key = self.labels_key()
+        self.frozen = True
+        return self
+
+    def __setattr__(self, name: str, value) -> None:
+        if getattr(self, 'frozen', False):
+            raise AttributeError(f'{type(self).__name__} is frozen and shared, {name} can not be changed')
+        super().__setattr__(name, value)
+
+    def labels_key(self) -> tuple:
+        """Hashable snapshot of labels, passed to pure renderers and used as a key of compiled templates"""
+        if self._frozen_labels_key is not None:
+            return self._frozen_labels_key
+        return (
+            tuple(self._labels.days_of_week), tuple(self._labels.months),
+            self._labels.cancel_caption, self._labels.today_caption
+        )
+
+    def _dates_range(self, min_date: datetime = None, max_date: datetime = None) -> tuple:
+        """Dates range passed per call, falls back to the one set by set_dates_range()"""
+        return min_date or self.min_date, max_date or self.max_date
+
+    def _today(self, tz: TimeZone = None) -> date:
+        """User's today for a request, tz overrides the calendar's time zone
+
+        Cached keyboards are keyed by the local date, not by user or zone, so users of all zones
+        with the same date share them. They are dropped once the day is over in every zone.
+        """
+        if self.cache is not None:
+            self.cache.roll_over(self.clock.earliest_today())
+        return self.clock.today(resolve_zone(tz) if tz is not None else self.tz)
+
+    def _render_key(
+        self, view: str, year: int, month: int, today: date, min_date: datetime = None, max_date: datetime = None
+    ) -> tuple:
+        """Key of rendered keyboard in cache, covers everything keyboard depends on, today goes last"""
+        return (
+            type(self).__name__, view, self.labels_key(), self.packed, self.compact, self.first_weekday,
+            year, month, min_date, max_date, self.rules, today
+        )
+
+    def _disabled_mask(self, year: int, month: int, min_date: datetime = None, max_date: datetime = None) -> int:
+        """Bit mask of days of month which can not be selected, day N is bit N - 1"""
+        mask = range_mask(year, month, days_in_month(year, month), min_date, max_date)
+        if self.rules:
+            mask |= self.rules.month_mask(year, month)
+        return mask
+
+    @property
+    def callback_packer(self):
+        """Packer of callbacks for calendar buttons, depends on compact option"""
+        return self.compact_codec if self.compact else self.packer
+
+    def _to_markup(self, rows: list, row_width: int) -> InlineKeyboardMarkup:
+        if self.packed:
+            return PackedMarkup.from_rows(rows, row_width)
+        return to_markup(rows, row_width)
+
+    def _markup(
+        self, view: str, year: int, month: int, today: date, min_date: datetime, max_date: datetime,
+        render: Callable[[], RenderedKeyboard]
+    ) -> InlineKeyboardMarkup:
+        """Markup of keyboard returned by pure renderer, cached under the render key
+
+        Callers get a copy of the cached markup, appending a row to it does not change the keyboard of others.
+        """
+        render_key = self._render_key(view, year, month, today, min_date, max_date)
+        cached = self._cache_get(render_key)
+        if self.metrics is not None and self.cache is not None:
+            self.metrics.count_cache(type(self).__name__, cached is not None)
+        if cached is not None:
+            return cached
+        if self.metrics is None:
+            keyboard = render()
+            return self._cache_put(render_key, self._to_markup(keyboard.rows, keyboard.row_width))
+        started = perf_counter()
+        keyboard = render()
+        markup = self._to_markup(keyboard.rows, keyboard.row_width)
+        self.metrics.observe_render(type(self).__name__, view, self.locale.language, perf_counter() - started)
+        return self._cache_put(render_key, markup)
+
+    def _cache_get(self, key: tuple):
+        if self.cache is None:
+            return None
+        markup = self.cache.get(key)
+        return None if markup is None else copy_markup(markup)
+
+    def _cache_put(self, key: tuple, markup):
+        if self.cache is None:
+            return markup
+        return copy_markup(self.cache.put(key, markup))
+
+    async def _api(self, query, make_call: Callable, priority: int = NAVIGATION):
+        """Makes Bot API call for query, through the scheduler if calendar has one"""
+        if self.scheduler is None:
+            return await make_call()
+        chat_id = query.message.chat.id if query.message else None
+        return await self.scheduler.call(chat_id, make_call, priority)
+
+    async def _answer(self, query, *args, **kwargs):
+        return await self._api(query, lambda: query.answer(*args, **kwargs), ANSWER)
+
+    async def _navigate(self, query, action: str, render: Callable) -> None:
+        """Shows keyboard returned by render (sync or async) for navigation action
+
+        In ack_first mode query is answered right away, concurrently with rendering and editing.
+        A failed answer does not fail the edit, queries get too old to answer after a backlog or restart.
+        """
+        if not self.ack_first:
+            markup = render()
+            if inspect.isawaitable(markup):
+                markup = await markup
+            await self._edit_markup(query, markup)
+            return
+
+        started = perf_counter()
+
+        async def ack() -> tuple:
+            try:
+                await self._answer(query)
+            except TelegramBadRequest:
+                return perf_counter() - started, False
+            return perf_counter() - started, True
+
+        ack_task = asyncio.ensure_future(ack())
+        try:
+            await asyncio.sleep(0)  # lets the answer go out before rendering, which may not yield
+            markup = render()
+            if inspect.isawaitable(markup):
+                markup = await markup
+            await self._edit_markup(query, markup, answered=True)
+            edit_time = perf_counter() - started
+        finally:
+            ack_time, acked = await ack_task
+        if self.timings is not None:
+            self.timings.record(
+                getattr(action, 'value', action), ack_time * 1000, edit_time * 1000,
+                (perf_counter() - started) * 1000, acked
+            )
+
+    async def _edit_markup(self, query, markup: InlineKeyboardMarkup, answered: bool = False) -> None:
+        """Shows markup in query message, answers query locally if the edit is skipped or superseded"""
+        if self.coalescer is None:
+            await self._send_markup(query, markup, answered)
+        elif not await self.coalescer.submit(
+            message_key(query.message), lambda: self._send_markup(query, markup, answered)
+        ):
+            if not answered:
+                await self._answer(query)
+
+    async def _send_markup(self, query, markup: InlineKeyboardMarkup, answered: bool = False) -> None:
+        if self.fingerprints is None:
+            await self._api(query, lambda: query.message.edit_reply_markup(reply_markup=markup))
+            return
+        fingerprint = markup_fingerprint(markup)
+        if self.fingerprints.is_shown(query.message, fingerprint):
+            if not answered:
+                await self._answer(query)
+            return
+        try:
+            await self._api(query, lambda: query.message.edit_reply_markup(reply_markup=markup))
+        except TelegramBadRequest as error:
+            # tap on an outdated keyboard, the message already shows this one
+            if 'message is not modified' not in error.message:
+                raise
+            self.fingerprints.suppressed += 1
+            if not answered:
+                await self._answer(query)
+        self.fingerprints.put(message_key(query.message), fingerprint)
+
+    async def _delete_markup(self, query) -> None:
+        """Removes inline keyboard from query message, after edits of it in flight if coalescing"""
+        if self.coalescer is None:
+            await self._send_delete(query)
+        else:
+            await self.coalescer.submit(message_key(query.message), lambda: self._send_delete(query), final=True)
+
+    async def _send_delete(self, query) -> None:
+        await self._api(query, query.message.delete_reply_markup, FINAL)
+        if self.fingerprints is not None:
+            self.fingerprints.discard(message_key(query.message))
 
     def set_dates_range(self, min_date: datetime, max_date: datetime):
         """Sets range of minimum & maximum dates"""
+        if self.frozen:
+            raise RuntimeError('Calendar is shared, pass min_date & max_date to its methods instead')
         self.min_date = min_date
         self.max_date = max_date
 
-    async def process_day_select(self, data, query):
-        """Checks selected date is in allowed range of dates"""
+    async def process_day_select(self, data, query, min_date: datetime = None, max_date: datetime = None):
+        """Checks selected date is in allowed range of dates and not disabled by rules"""
+        min_date, max_date = self._dates_range(min_date, max_date)
         date = datetime(int(data.year), int(data.month), int(data.day))
-        if self.min_date and self.min_date > date:
-            await query.answer(
-                f'The date have to be later {self.min_date.strftime("%d/%m/%Y")}',
-                show_alert=self.show_alerts
-            )
-            return False, None
-        elif self.max_date and self.max_date < date:
-            await query.answer(
-                f'The date have to be before {self.max_date.strftime("%d/%m/%Y")}',
-                show_alert=self.show_alerts
-            )
+        if self._disabled_mask(date.year, date.month, min_date, max_date) >> (date.day - 1) & 1:
+            if min_date and min_date > date:
+                reason, message = 'min_date', f'The date have to be later {min_date.strftime("%d/%m/%Y")}'
+            elif max_date and max_date < date:
+                reason, message = 'max_date', f'The date have to be before {max_date.strftime("%d/%m/%Y")}'
+            else:
+                reason, message = 'rules', f'The date {date.strftime("%d/%m/%Y")} is not available'
+            if self.metrics is not None:
+                self.metrics.count_rejection(type(self).__name__, reason)
+            await self._answer(query, message, show_alert=self.show_alerts)
             return False, None
-        await query.message.delete_reply_markup()  # removing inline keyboard
+        await self._delete_markup(query)  # removing inline keyboard
         return True, date
@@ -0,0 +1,152 @@
+from datetime import date
+from typing import Any, Dict, Literal, Type, Union
+
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+from .schemas import CalendarCallback, SimpleCalendarCallback, DialogCalendarCallback, SimpleCalAct, DialogCalAct
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# shapes of payload: whole date, month of year, year only or nothing
+DAY, MONTH, YEAR, NONE = 'd', 'm', 'y', ''
+
+
+def to_base36(value: int) -> str:
+    if value < 0:
+        raise ValueError('Only non-negative numbers are encoded')
+    result = ''
+    while True:
+        value, digit = divmod(value, 36)
+        result = DIGITS[digit] + result
+        if not value:
+            return result
+
+
+class CompactCodec:
+    """Compact wire format of calendar callbacks
+
+    Callback is packed as `<prefix>:<action code><base-36 ordinal>`, e.g. `sc:Dfue8` for 2024-12-12,
+    ordinal is a date ordinal, a month number since year 0 or a year depending on action.
+    Fields an action does not carry are restored with the constants calendars always pack for it.
+    """
+
+    def __init__(self, callback_cls: Type[CalendarCallback], prefix: str, actions: Dict[Any, tuple]) -> None:
+        """
+        Parameters:
+        callback_cls (type): callback class decoded values are constructed as
+        prefix (str): short prefix, must differ from callback_cls prefix
+        actions (dict): act -> (code, shape, month, day), month & day are used when shape does not carry them
+        """
+        self.callback_cls = callback_cls
+        self.prefix = prefix + ':'
+        self._actions = actions
+        self._encode = {}
+        self._decode = {}
+        for act, (code, shape, month, day) in actions.items():
+            self._encode[act] = self._encode[act.value] = (self.prefix + code, shape)
+            self._decode[code] = (act, shape, month, day)
+
+    def pack(self, act, year: int = None, month: int = None, day: int = None) -> str:
+        """Returns compact callback data, accepts the same arguments as CallbackPacker.pack()"""
+        try:
+            head, shape = self._encode[act]
+        except KeyError:
+            raise ValueError(f'Unknown action {act!r} for {self.callback_cls.__name__}') from None
+        if shape == DAY:
+            return head + to_base36(date(int(year), int(month), int(day)).toordinal())
+        if shape == MONTH:
+            return head + to_base36(int(year) * 12 + int(month) - 1)
+        if shape == YEAR:
+            return head + to_base36(int(year))
+        return head
+
+    def unpack(self, value: str) -> CalendarCallback:
+        """Decodes compact callback data without pydantic validation, raises ValueError for malformed data"""
+        if not value.startswith(self.prefix):
+            raise ValueError(f'Bad prefix of {value!r}')
+        try:
+            act, shape, month, day = self._decode[value[len(self.prefix)]]
+        except (KeyError, IndexError):
+            raise ValueError(f'Unknown action in {value!r}') from None
+        payload = value[len(self.prefix) + 1:]
+        year = None
+        if shape == DAY:
+            try:
+                selected = date.fromordinal(int(payload, 36))
+            except OverflowError:
+                raise ValueError(f'Bad date in {value!r}') from None
+            year, month, day = selected.year, selected.month, selected.day
+        elif shape == MONTH:
+            year, month = divmod(int(payload, 36), 12)
+            month += 1
+        elif shape == YEAR:
+            year = int(payload, 36)
+        elif payload:
+            raise ValueError(f'Unexpected payload in {value!r}')
+        return self.callback_cls.model_construct(act=act, year=year, month=month, day=day)
+
+    def __reduce__(self):
+        """Module level codecs are pickled by name, so worker processes reuse them and their compiled templates"""
+        for name in ('simple_codec', 'dialog_codec'):
+            if globals().get(name) is self:
+                return name
+        return CompactCodec, (self.callback_cls, self.prefix[:-1], self._actions)
+
+
+def fast_unpack(callback_cls: Type[CalendarCallback], value: str) -> CalendarCallback:
+    """Parses regular `prefix:act:year:month:day` callback data without pydantic validation"""
+    prefix, act, *numbers = value.split(callback_cls.__separator__)
+    if prefix != callback_cls.__prefix__ or len(numbers) != 3:
+        raise ValueError(f'Bad callback data {value!r}')
+    act = callback_cls.model_fields['act'].annotation(act)
+    year, month, day = (int(number) if number else None for number in numbers)
+    return callback_cls.model_construct(act=act, year=year, month=month, day=day)
+
+
+simple_codec = CompactCodec(SimpleCalendarCallback, 'sc', {
+    SimpleCalAct.ignore: ('I', NONE, None, None),
+    SimpleCalAct.prev_y: ('Y', MONTH, None, 1),
+    SimpleCalAct.next_y: ('y', MONTH, None, 1),
+    SimpleCalAct.prev_m: ('M', MONTH, None, 1),
+    SimpleCalAct.next_m: ('m', MONTH, None, 1),
+    SimpleCalAct.cancel: ('C', MONTH, None, None),
+    SimpleCalAct.today: ('T', MONTH, None, None),
+    SimpleCalAct.day: ('D', DAY, None, None),
+})
+
+dialog_codec = CompactCodec(DialogCalendarCallback, 'dc', {
+    DialogCalAct.ignore: ('I', NONE, None, None),
+    DialogCalAct.set_y: ('S', YEAR, -1, -1),
+    DialogCalAct.set_m: ('M', MONTH, None, -1),
+    DialogCalAct.prev_y: ('P', YEAR, -1, -1),
+    DialogCalAct.next_y: ('N', YEAR, 1, 1),
+    DialogCalAct.cancel: ('C', YEAR, 1, 1),
+    DialogCalAct.start: ('A', YEAR, -1, -1),
+    DialogCalAct.day: ('D', DAY, None, None),
+})
+
+
+class CalendarCallbackFilter(Filter):
+    """Callback query filter accepting both compact and regular calendar callbacks without validation
+
+    Usage:
+        @dp.callback_query(CalendarCallbackFilter(simple_codec))
+        async def process_simple_calendar(callback_query: CallbackQuery, callback_data: SimpleCalendarCallback):
+    """
+
+    __slots__ = ('codec',)
+
+    def __init__(self, codec: CompactCodec) -> None:
+        self.codec = codec
+
+    async def __call__(self, query: CallbackQuery) -> Union[Literal[False], Dict[str, Any]]:
+        data = query.data
+        if not data:
+            return False
+        try:
+            if data.startswith(self.codec.prefix):
+                return {'callback_data': self.codec.unpack(data)}
+            return {'callback_data': fast_unpack(self.codec.callback_cls, data)}
+        except (TypeError, ValueError, OverflowError):
+            return False
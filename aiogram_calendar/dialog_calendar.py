@@ -1,197 +1,236 @@
-import calendar
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import InlineKeyboardMarkup
 from aiogram.types import CallbackQuery
 
-from .schemas import DialogCalendarCallback, DialogCalAct, highlight, superscript
+from .schemas import DialogCalendarCallback, DialogCalAct, CallbackPacker, dialog_packer
 from .common import GenericCalendar
+from .clock import TimeZone
+from .compact import dialog_codec
+from .templates import KeyboardTemplate, RenderedKeyboard, apply_overlay
+from .grid import month_grid
 
 
-class DialogCalendar(GenericCalendar):
+IGNORE_CALLBACK = dialog_packer.pack(DialogCalAct.ignore)  # placeholder for no answer buttons
 
-    ignore_callback = DialogCalendarCallback(act=DialogCalAct.ignore).pack()    # placeholder for no answer buttons
 
-    async def _get_month_kb(self, year: int):
-        """Creates an inline keyboard with months for specified year"""
+def _cancel_cell(packer: CallbackPacker, cancel_caption: str, year: int) -> tuple:
+    return cancel_caption, packer.pack(DialogCalAct.cancel, year, 1, 1)
 
-        today = datetime.now()
-        now_month, now_year = today.month, today.year
-        now_year = today.year
-
-        kb = []
-        # first row with year button
-        years_row = []
-        years_row.append(
-            InlineKeyboardButton(
-                text=self._labels.cancel_caption,
-                callback_data=DialogCalendarCallback(act=DialogCalAct.cancel, year=year, month=1, day=1).pack()
-            )
-        )
-        years_row.append(InlineKeyboardButton(
-            text=str(year) if year != today.year else highlight(year),
-            callback_data=DialogCalendarCallback(act=DialogCalAct.start, year=year, month=-1, day=-1).pack()
-        ))
-        years_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-        kb.append(years_row)
-        # two rows with 6 months buttons
-        month6_row = []
-
-        def highlight_month():
-            month_str = self._labels.months[month - 1]
-            if now_month == month and now_year == year:
-                return highlight(month_str)
-            return month_str
-
-        for month in range(1, 7):
-            month6_row.append(InlineKeyboardButton(
-                text=highlight_month(),
-                callback_data=DialogCalendarCallback(
-                    act=DialogCalAct.set_m, year=year, month=month, day=-1
-                ).pack()
+
+def _start_cell(packer: CallbackPacker, year: int) -> tuple:
+    return str(year), packer.pack(DialogCalAct.start, year, -1, -1)
+
+
+@lru_cache(maxsize=256)
+def _compile_month_template(labels: tuple, year: int, packer: CallbackPacker = dialog_packer) -> KeyboardTemplate:
+    """Compiles keyboard with months of year, shared by all calendars with the same labels"""
+    _, months, cancel_caption, _ = labels
+    # first row with year button, then two rows with 6 months buttons
+    rows = [(
+        _cancel_cell(packer, cancel_caption, year), _start_cell(packer, year), (" ", packer.pack(DialogCalAct.ignore))
+    )]
+    month_cells = []
+    for months_range in (range(1, 7), range(7, 13)):
+        months_row = []
+        for month in months_range:
+            month_cells.append((month, (len(rows), len(months_row))))
+            months_row.append((
+                months[month - 1],
+                packer.pack(DialogCalAct.set_m, year, month, -1)
             ))
-        month12_row = []
-
-        for month in range(7, 13):
-            month12_row.append(InlineKeyboardButton(
-                text=highlight_month(),
-                callback_data=DialogCalendarCallback(
-                    act=DialogCalAct.set_m, year=year, month=month, day=-1
-                ).pack()
+        rows.append(tuple(months_row))
+    return KeyboardTemplate(
+        rows=tuple(rows), row_width=6, year=year,
+        year_cells=((year, (0, 1)),), month_cells=tuple(month_cells)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _compile_days_template(
+    labels: tuple, year: int, month: int, packer: CallbackPacker = dialog_packer, first_weekday: int = 0
+) -> KeyboardTemplate:
+    """Compiles keyboard with days of month, shared by all calendars with the same labels"""
+    days_of_week, months, cancel_caption, _ = labels
+    days_of_week = days_of_week[first_weekday:] + days_of_week[:first_weekday]
+    ignore_callback = packer.pack(DialogCalAct.ignore)
+    rows = [
+        (
+            _cancel_cell(packer, cancel_caption, year),
+            _start_cell(packer, year),
+            (months[month - 1], packer.pack(DialogCalAct.set_y, year, -1, -1))
+        ),
+        tuple((weekday, ignore_callback) for weekday in days_of_week),
+    ]
+
+    day_cells = []
+    for week in month_grid(year, month, first_weekday):
+        days_row = []
+        for day in week:
+            if day == 0:
+                days_row.append((" ", ignore_callback))
+                continue
+            day_cells.append((len(rows), len(days_row)))
+            days_row.append((
+                str(day), packer.pack(DialogCalAct.day, year, month, day)
             ))
+        rows.append(tuple(days_row))
+    return KeyboardTemplate(
+        rows=tuple(rows), row_width=7, year=year, month=month,
+        year_cells=((year, (0, 1)),), month_cells=((month, (0, 2)),),
+        weekday_row=1, day_cells=tuple(day_cells), first_weekday=first_weekday
+    )
+
+
+@lru_cache(maxsize=256)
+def _compile_years_template(labels: tuple, year: int, packer: CallbackPacker = dialog_packer) -> KeyboardTemplate:
+    """Compiles keyboard with five years around the specified one"""
+    cancel_caption = labels[2]
+    years_row = tuple(
+        (str(value), packer.pack(DialogCalAct.set_y, value, -1, -1))
+        for value in range(year - 2, year + 3)
+    )
+    # nav buttons
+    nav_row = (
+        ('<<', packer.pack(DialogCalAct.prev_y, year, -1, -1)),
+        _cancel_cell(packer, cancel_caption, year),
+        ('>>', packer.pack(DialogCalAct.next_y, year, 1, 1)),
+    )
+    return KeyboardTemplate(
+        rows=(years_row, nav_row), row_width=5, year=year,
+        year_cells=tuple((value, (0, col)) for col, value in enumerate(range(year - 2, year + 3)))
+    )
+
+
+def render_years(labels: tuple, year: int, today: date, packer: CallbackPacker = dialog_packer) -> RenderedKeyboard:
+    """Renders keyboard of five years around year as plain data, pure and synchronous
+
+    Renderers of this module are safe to call from worker threads and processes,
+    all arguments and results can be pickled.
+
+    Parameters:
+    labels (tuple): (days_of_week, months, cancel_caption, today_caption), see GenericCalendar.labels_key()
+    today (date): day highlighted, user's today
+    packer: callback packer, dialog_packer or dialog_codec for compact callbacks
+    """
+    template = _compile_years_template(labels, year, packer)
+    return RenderedKeyboard(apply_overlay(template, today), template.row_width)
+
+
+def render_months(labels: tuple, year: int, today: date, packer: CallbackPacker = dialog_packer) -> RenderedKeyboard:
+    """Renders keyboard of months of year as plain data, pure and synchronous"""
+    template = _compile_month_template(labels, year, packer)
+    return RenderedKeyboard(apply_overlay(template, today), template.row_width)
+
+
+def render_days(
+    labels: tuple, year: int, month: int, today: date, disabled_mask: int = 0,
+    packer: CallbackPacker = dialog_packer, first_weekday: int = 0
+) -> RenderedKeyboard:
+    """Renders keyboard of month days as plain data, pure and synchronous
+
+    Parameters:
+    disabled_mask (int): days which can not be selected, day N is bit N - 1
+    first_weekday (int): day of week calendar weeks start with, 0 is Monday
+    """
+    template = _compile_days_template(labels, year, month, packer, first_weekday)
+    return RenderedKeyboard(apply_overlay(template, today, disabled_mask), template.row_width)
 
-        kb.append(month6_row)
-        kb.append(month12_row)
-        return InlineKeyboardMarkup(row_width=6, inline_keyboard=kb)
 
-    async def _get_days_kb(self, year: int, month: int):
+class DialogCalendar(GenericCalendar):
+
+    ignore_callback = IGNORE_CALLBACK  # placeholder for no answer buttons
+    packer = dialog_packer
+    compact_codec = dialog_codec
+
+    async def _get_month_kb(self, year: int, today: date = None):
+        """Creates an inline keyboard with months for specified year"""
+        return self._month_kb(year, today or self._today())
+
+    async def _get_days_kb(
+        self, year: int, month: int, min_date: datetime = None, max_date: datetime = None, today: date = None
+    ):
         """Creates an inline keyboard with calendar days of month for specified year and month"""
+        return self._days_kb(year, month, today or self._today(), min_date, max_date)
 
-        today = datetime.now()
-        now_weekday = self._labels.days_of_week[today.weekday()]
-        now_month, now_year, now_day = today.month, today.year, today.day
-
-        def highlight_month():
-            month_str = self._labels.months[month - 1]
-            if now_month == month and now_year == year:
-                return highlight(month_str)
-            return month_str
-
-        def highlight_weekday():
-            if now_month == month and now_year == year and now_weekday == weekday:
-                return highlight(weekday)
-            return weekday
-
-        def format_day_string():
-            date_to_check = datetime(year, month, day)
-            if self.min_date and date_to_check < self.min_date:
-                return superscript(str(day))
-            elif self.max_date and date_to_check > self.max_date:
-                return superscript(str(day))
-            return str(day)
-
-        def highlight_day():
-            day_string = format_day_string()
-            if now_month == month and now_year == year and now_day == day:
-                return highlight(day_string)
-            return day_string
-
-        kb = []
-        nav_row = []
-        nav_row.append(
-            InlineKeyboardButton(
-                text=self._labels.cancel_caption,
-                callback_data=DialogCalendarCallback(act=DialogCalAct.cancel, year=year, month=1, day=1).pack()
-            )
-        )
-        nav_row.append(InlineKeyboardButton(
-            text=str(year) if year != now_year else highlight(year),
-            callback_data=DialogCalendarCallback(act=DialogCalAct.start, year=year, month=-1, day=-1).pack()
+    def _month_kb(self, year: int, today: date) -> InlineKeyboardMarkup:
+        return self._markup('months', year, None, today, None, None, lambda: render_months(
+            self.labels_key(), year, today, self.callback_packer
+        ))
+
+    def _days_kb(
+        self, year: int, month: int, today: date, min_date: datetime = None, max_date: datetime = None
+    ) -> InlineKeyboardMarkup:
+        min_date, max_date = self._dates_range(min_date, max_date)
+        return self._markup('days', year, month, today, min_date, max_date, lambda: render_days(
+            self.labels_key(), year, month, today, self._disabled_mask(year, month, min_date, max_date),
+            self.callback_packer, self.first_weekday
         ))
-        nav_row.append(InlineKeyboardButton(
-            text=highlight_month(),
-            callback_data=DialogCalendarCallback(act=DialogCalAct.set_y, year=year, month=-1, day=-1).pack()
+
+    def _years_kb(self, year: int, today: date) -> InlineKeyboardMarkup:
+        return self._markup('years', year, None, today, None, None, lambda: render_years(
+            self.labels_key(), year, today, self.callback_packer
         ))
-        kb.append(nav_row)
-
-        week_days_labels_row = []
-        for weekday in self._labels.days_of_week:
-            week_days_labels_row.append(InlineKeyboardButton(
-                text=highlight_weekday(), callback_data=self.ignore_callback))
-        kb.append(week_days_labels_row)
-
-        month_calendar = calendar.monthcalendar(year, month)
-
-        for week in month_calendar:
-            days_row = []
-            for day in week:
-                if day == 0:
-                    days_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-                    continue
-                days_row.append(InlineKeyboardButton(
-                    text=highlight_day(),
-                    callback_data=DialogCalendarCallback(act=DialogCalAct.day, year=year, month=month, day=day).pack()
-                ))
-            kb.append(days_row)
-        return InlineKeyboardMarkup(row_width=7, inline_keyboard=kb)
 
     async def start_calendar(
         self,
-        year: int = datetime.now().year,
-        month: int = None
+        year: int = None,
+        month: int = None,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
+    ) -> InlineKeyboardMarkup:
+        return self.render_calendar(year, month, min_date, max_date, tz)
+
+    def render_calendar(
+        self,
+        year: int = None,
+        month: int = None,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
     ) -> InlineKeyboardMarkup:
-        today = datetime.now()
-        now_year = today.year
+        """Synchronous start_calendar() for synchronous code and worker threads"""
+        today = self._today(tz)
+        year = year or today.year
 
         if month:
-            return await self._get_days_kb(year, month)
-        kb = []
-        # inline_kb = InlineKeyboardMarkup(row_width=5)
-        # first row - years
-        years_row = []
-        for value in range(year - 2, year + 3):
-            years_row.append(InlineKeyboardButton(
-                text=str(value) if value != now_year else highlight(value),
-                callback_data=DialogCalendarCallback(act=DialogCalAct.set_y, year=value, month=-1, day=-1).pack()
-            ))
-        kb.append(years_row)
-        # nav buttons
-        nav_row = []
-        nav_row.append(InlineKeyboardButton(
-            text='<<',
-            callback_data=DialogCalendarCallback(act=DialogCalAct.prev_y, year=year, month=-1, day=-1).pack()
-        ))
-        nav_row.append(InlineKeyboardButton(
-            text=self._labels.cancel_caption,
-            callback_data=DialogCalendarCallback(act=DialogCalAct.cancel, year=year, month=1, day=1).pack()
-        ))
-        nav_row.append(InlineKeyboardButton(
-            text='>>',
-            callback_data=DialogCalendarCallback(act=DialogCalAct.next_y, year=year, month=1, day=1).pack()
-        ))
-        kb.append(nav_row)
-        return InlineKeyboardMarkup(row_width=5, inline_keyboard=kb)
+            return self._days_kb(year, month, today, min_date, max_date)
+        return self._years_kb(year, today)
 
-    async def process_selection(self, query: CallbackQuery, data: DialogCalendarCallback) -> tuple:
+    async def process_selection(
+        self,
+        query: CallbackQuery,
+        data: DialogCalendarCallback,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
+    ) -> tuple:
         return_data = (False, None)
+        if self.metrics is not None:
+            self.metrics.count_action(type(self).__name__, data.act)
+        if data.act == DialogCalAct.day:
+            return await self.process_day_select(data, query, min_date, max_date)
+
+        today = self._today(tz)  # one date for the whole request
         if data.act == DialogCalAct.ignore:
-            await query.answer(cache_time=60)
+            await self._answer(query, cache_time=60)
         if data.act == DialogCalAct.set_y:
-            await query.message.edit_reply_markup(reply_markup=await self._get_month_kb(int(data.year)))
+            await self._navigate(query, data.act, lambda: self._month_kb(int(data.year), today))
         if data.act == DialogCalAct.prev_y:
             new_year = int(data.year) - 5
-            await query.message.edit_reply_markup(reply_markup=await self.start_calendar(year=new_year))
+            await self._navigate(query, data.act, lambda: self._years_kb(new_year, today))
         if data.act == DialogCalAct.next_y:
             new_year = int(data.year) + 5
-            await query.message.edit_reply_markup(reply_markup=await self.start_calendar(year=new_year))
+            await self._navigate(query, data.act, lambda: self._years_kb(new_year, today))
         if data.act == DialogCalAct.start:
-            await query.message.edit_reply_markup(reply_markup=await self.start_calendar(int(data.year)))
+            await self._navigate(query, data.act, lambda: self._years_kb(int(data.year), today))
         if data.act == DialogCalAct.set_m:
-            await query.message.edit_reply_markup(reply_markup=await self._get_days_kb(int(data.year), int(data.month)))
-        if data.act == DialogCalAct.day:
-
-            return await self.process_day_select(data, query)
+            await self._navigate(
+                query, data.act, lambda: self._days_kb(int(data.year), int(data.month), today, min_date, max_date)
+            )
 
         if data.act == DialogCalAct.cancel:
-            await query.message.delete_reply_markup()
+            await self._delete_markup(query)
         return return_data
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+
+def markup_fingerprint(markup: Optional[InlineKeyboardMarkup]) -> int:
+    """Hash of buttons captions & callbacks, equal for keyboards rendered alike, PackedMarkup or not"""
+    if markup is None:
+        return 0
+    return hash(tuple(
+        tuple((button.text, button.callback_data) for button in row) for row in markup.inline_keyboard
+    ))
+
+
+def message_key(message) -> tuple:
+    return message.chat.id, message.message_id
+
+
+class MarkupFingerprints:
+    """Bounded store of fingerprints of keyboards last sent per message
+
+    Calendars look up the keyboard a message shows before editing it and skip edits
+    which would not change it, Telegram rejects those with "message is not modified" anyway.
+    The keyboard the callback query came with is trusted first, since the message may have been
+    edited elsewhere, the store is used for messages coming without one.
+    """
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        """
+        Parameters:
+        maxsize (int): maximum number of messages kept, least recently edited are forgotten first
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive')
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, int]' = OrderedDict()
+        self.suppressed = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[int]:
+        return self._data.get(key)
+
+    def put(self, key: Hashable, fingerprint: int) -> None:
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = fingerprint
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def is_shown(self, message, fingerprint: int) -> bool:
+        """Checks if message already shows keyboard with fingerprint, counts suppressed edits"""
+        reply_markup = getattr(message, 'reply_markup', None)
+        if reply_markup is not None:
+            current = markup_fingerprint(reply_markup)
+        else:
+            current = self._data.get(message_key(message))
+        if current == fingerprint:
+            self.suppressed += 1
+            return True
+        return False
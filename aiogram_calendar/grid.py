@@ -0,0 +1,43 @@
+import calendar
+from datetime import date
+from functools import lru_cache
+from typing import Tuple
+
+Grid = Tuple[Tuple[int, ...], ...]      # weeks of a month, days outside of month are 0
+
+
+def month_ordinal(year: int, month: int) -> int:
+    """Number of month since year 0, neighbour months differ by one"""
+    return year * 12 + month - 1
+
+
+def from_month_ordinal(ordinal: int) -> Tuple[int, int]:
+    """Returns (year, month) of month ordinal"""
+    year, month = divmod(ordinal, 12)
+    return year, month + 1
+
+
+@lru_cache(maxsize=None)
+def _year_layout(first_weekday: int, january_weekday: int, leap: bool) -> Tuple[Grid, ...]:
+    """Grids of 12 months of any year starting on january_weekday, there are only 14 distinct layouts"""
+    # every layout occurs within 28 years of the Gregorian cycle
+    sample = next(
+        year for year in range(2000, 2028)
+        if date(year, 1, 1).weekday() == january_weekday and calendar.isleap(year) == leap
+    )
+    month_calendar = calendar.Calendar(first_weekday)
+    return tuple(
+        tuple(tuple(week) for week in month_calendar.monthdayscalendar(sample, month))
+        for month in range(1, 13)
+    )
+
+
+def month_grid(year: int, month: int, first_weekday: int = 0) -> Grid:
+    """Weeks of month like calendar.monthcalendar(), independent of calendar.firstweekday()
+
+    Parameters:
+    first_weekday (int): day of week the week starts with, 0 is Monday, 6 is Sunday
+    """
+    if not 0 <= first_weekday <= 6:
+        raise ValueError('first_weekday must be in range 0..6')
+    return _year_layout(first_weekday, date(year, 1, 1).weekday(), calendar.isleap(year))[month - 1]
@@ -1,4 +1,17 @@
-from typing import Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .catalog import default_catalog, Translations
+
+DEFAULT_LANGUAGE = 'en'
+
+# language tried when there are no captions in user's language, English is the last resort anyway
+LANGUAGE_FALLBACKS = {
+    'uk': 'ru', 'be': 'ru', 'kk': 'ru', 'ky': 'ru', 'uz': 'ru', 'tg': 'ru', 'tt': 'ru',
+    'ba': 'ru', 'cv': 'ru', 'hy': 'ru', 'az': 'ru', 'ka': 'ru', 'mn': 'ru',
+    'no': 'nb', 'nn': 'nb', 'iw': 'he', 'in': 'id',
+}
 
 class Localization:
     """Class for managing calendar localizations"""
@@ -17,6 +30,7 @@ class Localization:
             'previous_month': '<<',
             'next_month': '>>',
             'ignore': 'Игнорировать',
+            'cancel': 'Отмена',
             'today': 'Сегодня',
             'tomorrow': 'Завтра',
             'next_week': 'Через неделю',
@@ -42,6 +56,7 @@ class Localization:
             'previous_month': '<<',
             'next_month': '>>',
             'ignore': 'Ignore',
+            'cancel': 'Cancel',
             'today': 'Today',
             'tomorrow': 'Tomorrow',
             'next_week': 'Next week',
@@ -62,9 +77,10 @@ class Localization:
         Initialize localization
         
         Args:
-            language (str): Language code ('en' or 'ru')
+            language (str): Language code ('en', 'ru') or locale ('uk_UA'), resolved with resolve_language()
         """
-        self.language = language if language in self.TRANSLATIONS else 'en'
+        self.language = resolve_language(language)
+        self.translations = get_translations(self.language)
 
     def get_text(self, key: str) -> str:
         """
@@ -76,7 +92,9 @@ class Localization:
         Returns:
             str: Localized text
         """
-        return self.TRANSLATIONS[self.language].get(key, key)
+        if key in self.translations:
+            return self.translations[key]
+        return self.TRANSLATIONS[DEFAULT_LANGUAGE].get(key, key)
 
     def get_month_name(self, month: int) -> str:
         """
@@ -89,7 +107,7 @@ class Localization:
             str: Localized month name
         """
         if 1 <= month <= 12:
-            return self.TRANSLATIONS[self.language]['months'][month - 1]
+            return self.translations['months'][month - 1]
         return str(month)
 
     def get_weekday_name(self, weekday: int) -> str:
@@ -103,7 +121,7 @@ class Localization:
             str: Localized weekday name
         """
         if 0 <= weekday <= 6:
-            return self.TRANSLATIONS[self.language]['days'][weekday]
+            return self.translations['days'][weekday]
         return str(weekday)
 
     @classmethod
@@ -114,4 +132,88 @@ class Localization:
         Returns:
             list: List of available language codes
         """
-        return list(cls.TRANSLATIONS.keys())
+        return list(cls.TRANSLATIONS) + [
+            language for language in default_catalog.languages() if language not in cls.TRANSLATIONS
+        ]
+
+
+def get_translations(language: str) -> Translations:
+    """
+    Get translations of language, built-in or from locale catalog loaded on first use
+
+    Keys missing in locale pack are taken from DEFAULT_LANGUAGE
+
+    Args:
+        language (str): Language code returned by resolve_language()
+
+    Returns:
+        dict: Translations of language
+    """
+    if language in Localization.TRANSLATIONS:
+        return Localization.TRANSLATIONS[language]
+    return _merged_translations(language)
+
+
+@lru_cache(maxsize=None)
+def _merged_translations(language: str) -> Translations:
+    return {**Localization.TRANSLATIONS[DEFAULT_LANGUAGE], **(default_catalog.load(language) or {})}
+
+
+def add_locale_path(path: Union[str, Path]) -> None:
+    """
+    Add directory with locale packs (JSON, gettext .mo or compiled catalog.bin)
+
+    Args:
+        path (str): Directory, its packs take precedence over packs added earlier
+    """
+    default_catalog.add_path(path)
+    _reset_caches()
+
+
+def register_language(language: str, translations: Translations) -> None:
+    """
+    Add locale pack from memory
+
+    Args:
+        language (str): Language code like 'pt'
+        translations (dict): Translations with keys of Localization.TRANSLATIONS
+    """
+    default_catalog.register(language, translations)
+    _reset_caches()
+
+
+def _reset_caches() -> None:
+    resolve_language.cache_clear()
+    _merged_translations.cache_clear()
+
+
+@lru_cache(maxsize=1024)
+def resolve_language(code: Optional[str]) -> str:
+    """
+    Resolve Telegram language code or locale to a language having translations, never fails
+
+    Region is dropped when there is no translation for it ('pt-br' -> 'pt'),
+    then LANGUAGE_FALLBACKS are followed ('tt' -> 'ru'), DEFAULT_LANGUAGE is returned at last.
+    Results are memoized per code.
+
+    Args:
+        code (str): Language code like 'en', 'pt-br' or locale like 'uk_UA.UTF-8'
+
+    Returns:
+        str: Language code available in Localization.TRANSLATIONS or locale catalog
+    """
+    if not code:
+        return DEFAULT_LANGUAGE
+    language = code.split('.')[0].replace('_', '-').lower()
+    seen = set()
+    while language not in seen:
+        if language in Localization.TRANSLATIONS or language in default_catalog:
+            return language
+        seen.add(language)
+        if language in LANGUAGE_FALLBACKS:
+            language = LANGUAGE_FALLBACKS[language]
+        elif '-' in language:
+            language = language.rsplit('-', 1)[0]
+        else:
+            break
+    return DEFAULT_LANGUAGE
@@ -0,0 +1,66 @@
+import json
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from pydantic import PrivateAttr
+
+
+class PackedMarkup(InlineKeyboardMarkup):
+    """Ready to send inline keyboard with pre-serialized JSON
+
+    Built without pydantic validation, so it is cheap to create and to keep in a cache.
+    Being an InlineKeyboardMarkup it is accepted by any reply_markup parameter,
+    with PackedMarkupMiddleware registered the cached JSON is sent as is instead of dumping the model again.
+    """
+    _json: str = PrivateAttr(default='')
+    _json_bytes: bytes = PrivateAttr(default=b'')
+
+    @classmethod
+    def from_rows(cls, rows: list, row_width: int) -> 'PackedMarkup':
+        """Creates markup from rows of (text, callback_data)"""
+        markup = cls.model_construct(
+            inline_keyboard=[
+                [InlineKeyboardButton.model_construct(text=text, callback_data=data) for text, data in row]
+                for row in rows
+            ],
+            row_width=row_width
+        )
+        markup._json = json.dumps(
+            {
+                'inline_keyboard': [
+                    [{'text': text, 'callback_data': callback_data} for text, callback_data in row] for row in rows
+                ],
+                'row_width': row_width
+            },
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        markup._json_bytes = markup._json.encode()
+        return markup
+
+    @property
+    def json_text(self) -> str:
+        """Serialized markup as JSON string"""
+        return self._json
+
+    @property
+    def json_bytes(self) -> bytes:
+        """Serialized markup as UTF-8 encoded JSON"""
+        return self._json_bytes
+
+
+class PackedMarkupMiddleware(BaseRequestMiddleware):
+    """Request middleware sending PackedMarkup as its cached JSON
+
+    Usage:
+        bot.session.middleware(PackedMarkupMiddleware())
+    """
+
+    async def __call__(self, make_request, bot, method):
+        markup = getattr(method, 'reply_markup', None)
+        if isinstance(markup, PackedMarkup):
+            # built without validation, session passes string values to the request body untouched
+            values = dict(method)
+            values['reply_markup'] = markup.json_text
+            method = type(method).model_construct(_fields_set=method.model_fields_set, **values)
+        return await make_request(bot, method)
@@ -0,0 +1,146 @@
+import bisect
+import threading
+from collections import Counter
+from typing import Tuple
+
+# upper bounds of render latency buckets, seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Counts of observed values per bucket, bucket N counts values in (bounds[N - 1], bounds[N]]"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """(upper bound, values not above it) for each bucket, the last bound is inf"""
+        result, total = [], 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class CalendarMetrics:
+    """Counters of calendar actions, render latency, rejected days and cache lookups
+
+    Calendars record nothing unless a registry is passed to them, one registry is shared by all
+    calendars of a bot. expose() returns a snapshot in Prometheus text format.
+
+    Usage:
+        metrics = CalendarMetrics()
+        calendar = SimpleCalendar(metrics=metrics)
+        ...
+        runner = await metrics.serve(port=9464)     # GET http://127.0.0.1:9464/metrics
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, namespace: str = 'aiogram_calendar') -> None:
+        """
+        Parameters:
+        buckets (tuple): upper bounds of render latency buckets in seconds, ascending
+        namespace (str): prefix of metric names
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()   # renders may run in worker threads
+        self.actions = Counter()        # (calendar, action) -> count
+        self.rejections = Counter()     # (calendar, reason) -> count
+        self.cache = Counter()          # (calendar, 'hit' | 'miss') -> count
+        self.renders = {}               # (calendar, view, locale) -> Histogram
+
+    def count_action(self, calendar: str, action) -> None:
+        with self._lock:
+            self.actions[calendar, getattr(action, 'value', action)] += 1
+
+    def count_rejection(self, calendar: str, reason: str) -> None:
+        """reason is min_date, max_date or rules"""
+        with self._lock:
+            self.rejections[calendar, reason] += 1
+
+    def count_cache(self, calendar: str, hit: bool) -> None:
+        with self._lock:
+            self.cache[calendar, 'hit' if hit else 'miss'] += 1
+
+    def observe_render(self, calendar: str, view: str, locale: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.renders.get((calendar, view, locale))
+            if histogram is None:
+                histogram = self.renders[calendar, view, locale] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.actions.clear()
+            self.rejections.clear()
+            self.cache.clear()
+            self.renders.clear()
+
+    def expose(self) -> str:
+        """Snapshot of all metrics in Prometheus text exposition format"""
+        prefix = self.namespace
+        lines = []
+
+        def counter(name: str, help_text: str, values: Counter, label_names: tuple) -> None:
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            for key in sorted(values):
+                lines.append(f'{prefix}_{name}{{{_labels(label_names, key)}}} {values[key]}')
+
+        with self._lock:
+            counter('actions_total', 'Callback actions processed.', self.actions, ('calendar', 'action'))
+            counter(
+                'day_rejections_total', 'Selected days rejected as out of range or disabled.',
+                self.rejections, ('calendar', 'reason')
+            )
+            counter('cache_requests_total', 'Rendered keyboard cache lookups.', self.cache, ('calendar', 'result'))
+
+            name = f'{prefix}_render_seconds'
+            lines.append(f'# HELP {name} Time of rendering keyboard markup, cache misses only.')
+            lines.append(f'# TYPE {name} histogram')
+            for key in sorted(self.renders):
+                histogram = self.renders[key]
+                labels = _labels(('calendar', 'view', 'locale'), key)
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum!r}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 9464, path: str = '/metrics'):
+        """Starts HTTP endpoint with expose() output, returns aiohttp AppRunner, stop it with runner.cleanup()"""
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(body=self.expose().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get(path, handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
@@ -0,0 +1,42 @@
+from typing import Type, TypeVar
+
+from .common import GenericCalendar
+
+CalendarType = TypeVar('CalendarType', bound=GenericCalendar)
+
+
+class CalendarRegistry:
+    """Shares frozen calendar instances between handlers instead of constructing a calendar per update
+
+    Usage:
+        calendar = registry.get(SimpleCalendar, locale=user_lang, show_alerts=True)
+        selected, date = await calendar.process_selection(query, data, min_date=min_date, max_date=max_date)
+    """
+
+    def __init__(self) -> None:
+        self._calendars = {}
+
+    def __len__(self) -> int:
+        return len(self._calendars)
+
+    def get(self, calendar_cls: Type[CalendarType], locale: str = None, **options) -> CalendarType:
+        """Returns shared calendar of calendar_cls for locale & options, options are calendar init arguments
+
+        Options must be hashable, calendars created with equal arguments are the same object.
+        """
+        key = (calendar_cls, locale, tuple(sorted(options.items())))
+        calendar = self._calendars.get(key)
+        if calendar is None:
+            calendar = self._calendars.setdefault(key, calendar_cls(locale=locale, **options).freeze())
+        return calendar
+
+    def clear(self) -> None:
+        self._calendars.clear()
+
+
+default_registry = CalendarRegistry()
+
+
+def get_calendar(calendar_cls: Type[CalendarType], locale: str = None, **options) -> CalendarType:
+    """Returns shared calendar from the default registry, see CalendarRegistry.get()"""
+    return default_registry.get(calendar_cls, locale, **options)
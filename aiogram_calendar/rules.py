@@ -0,0 +1,120 @@
+import calendar
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+
+def days_in_month(year: int, month: int) -> int:
+    return calendar.monthrange(year, month)[1]
+
+
+def day_bounds(year: int, month: int, days: int, min_date: datetime = None, max_date: datetime = None):
+    """Returns first & last days of month inside dates range, compares midnight of a day like datetime does"""
+    first_ordinal = date(year, month, 1).toordinal()
+    first, last = 1, days
+    if min_date:
+        min_ordinal = min_date.toordinal()
+        if isinstance(min_date, datetime) and min_date.time() != time(0):
+            min_ordinal += 1    # midnight of the min day is earlier than min_date
+        first = max(first, min_ordinal - first_ordinal + 1)
+    if max_date:
+        last = min(last, max_date.toordinal() - first_ordinal + 1)
+    return first, last
+
+
+def span_mask(first: int, last: int) -> int:
+    """Bit mask with bits of days first..last set, day N is bit N - 1"""
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << (first - 1)
+
+
+def range_mask(year: int, month: int, days: int, min_date: datetime = None, max_date: datetime = None) -> int:
+    """Bit mask of month days outside of min_date..max_date range"""
+    if not min_date and not max_date:
+        return 0
+    first, last = day_bounds(year, month, days, min_date, max_date)
+    return span_mask(1, days) & ~span_mask(max(first, 1), min(last, days))
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class DateRules:
+    """Immutable set of rules disabling dates for selection
+
+    Rules are compiled into a bit mask per month, day N of month is disabled when bit N - 1 is set.
+    Masks are memoized per rule set, so equal rule sets share them.
+    """
+
+    __slots__ = ('min_date', 'max_date', 'blackouts', 'weekdays', 'dates', '_dates_by_month', '_key')
+
+    def __init__(
+        self,
+        min_date: date = None,
+        max_date: date = None,
+        blackouts: Iterable[Tuple[date, date]] = (),
+        weekdays: Iterable[int] = (),
+        dates: Iterable[date] = ()
+    ) -> None:
+        """
+        Parameters:
+        min_date (date): dates before it are disabled
+        max_date (date): dates after it are disabled
+        blackouts (iterable): pairs of (first, last) dates, both included, disabled
+        weekdays (iterable): disabled days of week, 0 is Monday
+        dates (iterable): explicitly excluded dates
+        """
+        self.min_date = _as_date(min_date)
+        self.max_date = _as_date(max_date)
+        self.blackouts = tuple(sorted((_as_date(first), _as_date(last)) for first, last in blackouts))
+        self.weekdays = frozenset(weekdays)
+        if any(not 0 <= weekday <= 6 for weekday in self.weekdays):
+            raise ValueError('weekdays must be in range 0..6')
+        self.dates = frozenset(_as_date(value) for value in dates)
+        self._dates_by_month = {}
+        for value in self.dates:
+            self._dates_by_month.setdefault((value.year, value.month), []).append(value.day)
+        self._key = (self.min_date, self.max_date, self.blackouts, self.weekdays, self.dates)
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DateRules) and self._key == other._key
+
+    def __repr__(self) -> str:
+        return (
+            f'DateRules(min_date={self.min_date!r}, max_date={self.max_date!r}, blackouts={self.blackouts!r}, '
+            f'weekdays={sorted(self.weekdays)!r}, dates={sorted(self.dates)!r})'
+        )
+
+    def month_mask(self, year: int, month: int) -> int:
+        """Bit mask of disabled days of month"""
+        return _compile_month_mask(self, year, month)
+
+    def is_disabled(self, value: date) -> bool:
+        return bool(_compile_month_mask(self, value.year, value.month) >> (value.day - 1) & 1)
+
+
+@lru_cache(maxsize=4096)
+def _compile_month_mask(rules: DateRules, year: int, month: int) -> int:
+    days = days_in_month(year, month)
+    mask = range_mask(year, month, days, rules.min_date, rules.max_date)
+
+    first_ordinal = date(year, month, 1).toordinal()
+    for first, last in rules.blackouts:
+        mask |= span_mask(
+            max(first.toordinal() - first_ordinal + 1, 1),
+            min(last.toordinal() - first_ordinal + 1, days)
+        )
+
+    first_weekday = date(year, month, 1).weekday()
+    for weekday in rules.weekdays:
+        for day in range((weekday - first_weekday) % 7 + 1, days + 1, 7):
+            mask |= 1 << (day - 1)
+
+    for day in rules._dates_by_month.get((year, month), ()):
+        mask |= 1 << (day - 1)
+    return mask
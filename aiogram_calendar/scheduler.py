@@ -0,0 +1,180 @@
+import asyncio
+import bisect
+import itertools
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from aiogram.exceptions import TelegramRetryAfter
+
+# priorities of calls, lower goes first
+FINAL = 0           # removing keyboard after a date is selected or input is cancelled
+ANSWER = 1          # answering callback query
+NAVIGATION = 2      # redrawing keyboard
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second up to capacity, can be paused by retry_after"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """Time a token is available at, now or later"""
+        self._refill(now)
+        ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(ready, self.paused_until)
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = min(self.tokens, 0)
+
+    def is_idle(self, now: float) -> bool:
+        """Bucket is full and not paused, it can be forgotten"""
+        self._refill(now)
+        return self.tokens >= self.capacity and self.paused_until <= now
+
+
+class ApiScheduler:
+    """Schedules Bot API calls of calendars within per-chat and global rate limits
+
+    Calls wait for a token of their chat's bucket and of the global bucket, the waiting ones
+    are released by priority, so a selected date is confirmed before pending navigation redraws.
+    A call failed with TelegramRetryAfter pauses its chat and the whole bot for retry_after seconds and
+    is retried, Telegram does not tell a chat's flood wait from the bot's one, and keeping other chats
+    sending at the full rate during a bot-wide one only extends it.
+
+    Usage:
+        scheduler = ApiScheduler()
+        calendar = SimpleCalendar(scheduler=scheduler)
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        global_burst: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        max_chats: int = 10000,
+        timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Parameters:
+        global_rate (float): calls per second for the whole bot, Telegram allows about 30
+        global_burst (float): calls allowed at once over global_rate
+        chat_rate (float): calls per second per chat
+        chat_burst (float): calls allowed at once per chat
+        max_retries (int): retries of a call after TelegramRetryAfter
+        max_chats (int): buckets of chats kept, idle ones are forgotten first
+        timer (callable): monotonic clock in seconds
+        """
+        self._timer = timer
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_burst, timer())
+        self._chats: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+        self._waiting = []      # sorted (priority, sequence, chat_id, future)
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None     # loop the two above belong to
+        self.retries = 0
+
+    def __len__(self) -> int:
+        """Number of calls waiting for tokens"""
+        return len(self._waiting)
+
+    def _chat_bucket(self, chat_id: Hashable, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+            if len(self._chats) > self.max_chats:
+                # the new bucket is idle too, it is never the one forgotten
+                idle = [key for key, value in self._chats.items() if key != chat_id and value.is_idle(now)]
+                for key in idle:
+                    del self._chats[key]
+                    if len(self._chats) <= self.max_chats:
+                        break
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def call(self, chat_id: Hashable, make_call: Callable[[], Awaitable], priority: int = NAVIGATION):
+        """Calls make_call when rate limits allow, returns its result
+
+        Parameters:
+        chat_id (hashable): chat the call is made in
+        make_call (callable): coroutine function making the API call, called again on retry
+        priority (int): FINAL, ANSWER or NAVIGATION, lower goes first
+        """
+        for attempt in itertools.count():
+            await self._acquire(chat_id, priority)
+            try:
+                return await make_call()
+            except TelegramRetryAfter as error:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                until = self._timer() + error.retry_after
+                self._chat_bucket(chat_id, self._timer()).pause(until)
+                self._global.pause(until)
+
+    async def _acquire(self, chat_id: Hashable, priority: int) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # scheduler is reused under another loop (a new asyncio.run), calls waiting on the old one are lost
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = None
+            self._waiting = [item for item in self._waiting if item[3].get_loop() is loop]
+        future = loop.create_future()
+        bisect.insort(self._waiting, (priority, next(self._sequence), chat_id, future))
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """Releases waiting calls in priority order as tokens become available"""
+        while self._waiting:
+            self._wakeup.clear()
+            now = self._timer()
+            next_ready = None
+            global_ready = self._global.ready_at(now)
+            for index, (_, _, chat_id, future) in enumerate(self._waiting):
+                if future.done():   # caller was cancelled
+                    del self._waiting[index]
+                    break
+                bucket = self._chat_bucket(chat_id, now)
+                ready = max(global_ready, bucket.ready_at(now))
+                if ready <= now:
+                    del self._waiting[index]
+                    self._global.take(now)
+                    bucket.take(now)
+                    future.set_result(None)
+                    break
+                next_ready = ready if next_ready is None else min(next_ready, ready)
+            else:
+                # nothing can go now, sleep until the earliest token or a new call
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(next_ready - now, 0.001))
+                except asyncio.TimeoutError:
+                    pass
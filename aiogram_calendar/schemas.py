@@ -1,9 +1,12 @@
-from typing import Optional
+import sys
+from typing import Optional, Tuple, Type
 from enum import Enum
 
-from pydantic import BaseModel, conlist, Field
+from pydantic import BaseModel, ConfigDict, conlist, Field
 
-from aiogram.filters.callback_data import CallbackData
+from aiogram.filters.callback_data import CallbackData, MAX_CALLBACK_LENGTH
+
+from .localization import get_translations, resolve_language
 
 
 class SimpleCalAct(str, Enum):
@@ -43,6 +46,50 @@ class DialogCalendarCallback(CalendarCallback, prefix="dialog_calendar"):
     act: DialogCalAct
 
 
+class CallbackPacker:
+    """Packs calendar callback data without building and validating a pydantic model
+
+    Output is the same string CallbackData.pack() gives for (act, year, month, day),
+    so it is unpacked by the same callback class and handled by its filter.
+    """
+
+    def __init__(self, callback_cls: Type[CalendarCallback]) -> None:
+        self.callback_cls = callback_cls
+        sep = callback_cls.__separator__
+        act_type = callback_cls.model_fields['act'].annotation
+        # one format per action, prefix and action are interned, only numbers are formatted per call
+        self._formats = {}
+        for act in act_type:
+            head = sys.intern(sep.join((callback_cls.__prefix__, act.value)))
+            self._formats[act] = self._formats[act.value] = head + sep + sep.join(('%s', '%s', '%s'))
+
+    def pack(self, act, year: int = None, month: int = None, day: int = None) -> str:
+        """Returns callback data string, equal to callback_cls(act=..., year=..., month=..., day=...).pack()"""
+        try:
+            fmt = self._formats[act]
+        except KeyError:
+            raise ValueError(f'Unknown action {act!r} for {self.callback_cls.__name__}') from None
+        callback_data = fmt % (
+            '' if year is None else int(year),
+            '' if month is None else int(month),
+            '' if day is None else int(day)
+        )
+        if len(callback_data) > MAX_CALLBACK_LENGTH:
+            raise ValueError(f'Resulted callback data is too long! len({callback_data!r}) > {MAX_CALLBACK_LENGTH}')
+        return callback_data
+
+    def __reduce__(self):
+        """Module level packers are pickled by name, so worker processes reuse their compiled templates"""
+        for name in ('simple_packer', 'dialog_packer'):
+            if globals().get(name) is self:
+                return name
+        return CallbackPacker, (self.callback_cls,)
+
+
+simple_packer = CallbackPacker(SimpleCalendarCallback)
+dialog_packer = CallbackPacker(DialogCalendarCallback)
+
+
 class CalendarLabels(BaseModel):
     "Schema to pass labels for calendar. Can be used to put in different languages"
     days_of_week: conlist(str, max_length=7, min_length=7) = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
@@ -53,6 +100,25 @@ class CalendarLabels(BaseModel):
     cancel_caption: str = Field(default='Отмена', description='Надпись для кнопки Отмена')
     today_caption: str = Field(default='Сегодня', description='Надпись для кнопки Сегодня')
 
+    @classmethod
+    def for_language(cls, language: str) -> 'CalendarLabels':
+        "Labels from translations of language, built-in or loaded from locale catalog"
+        translations = get_translations(resolve_language(language))
+        return cls(
+            days_of_week=translations['days'],
+            months=translations['months'],
+            cancel_caption=translations['cancel'],
+            today_caption=translations['today'],
+        )
+
+
+class FrozenCalendarLabels(CalendarLabels):
+    "Read-only labels of a frozen calendar shared between handlers"
+    model_config = ConfigDict(frozen=True)
+
+    days_of_week: Tuple[str, ...] = Field(min_length=7, max_length=7)
+    months: Tuple[str, ...] = Field(min_length=12, max_length=12)
+
 
 HIGHLIGHT_FORMAT = "[{}]"
 
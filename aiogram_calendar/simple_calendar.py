@@ -1,181 +1,204 @@
-import calendar
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from functools import lru_cache
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import InlineKeyboardMarkup
 from aiogram.types import CallbackQuery
 
-from .schemas import SimpleCalendarCallback, SimpleCalAct, highlight, superscript
+from .schemas import SimpleCalendarCallback, SimpleCalAct, CallbackPacker, simple_packer
 from .common import GenericCalendar
+from .clock import TimeZone
+from .compact import simple_codec
+from .templates import KeyboardTemplate, RenderedKeyboard, apply_overlay
+from .grid import month_grid, month_ordinal, from_month_ordinal
+
+
+IGNORE_CALLBACK = simple_packer.pack(SimpleCalAct.ignore)  # placeholder for no answer buttons
+
+
+@lru_cache(maxsize=1024)
+def _compile_days_template(
+    labels: tuple, year: int, month: int, packer: CallbackPacker = simple_packer, first_weekday: int = 0
+) -> KeyboardTemplate:
+    """Compiles keyboard of month days, shared by all calendars with the same labels"""
+    days_of_week, months, cancel_caption, today_caption = labels
+    days_of_week = days_of_week[first_weekday:] + days_of_week[:first_weekday]
+    ignore_callback = packer.pack(SimpleCalAct.ignore)
+
+    def nav_callback(act):
+        return packer.pack(act, year, month, 1)
+
+    # First row - Year, then Month nav Buttons
+    rows = [
+        (
+            ("<<", nav_callback(SimpleCalAct.prev_y)),
+            (str(year), ignore_callback),
+            (">>", nav_callback(SimpleCalAct.next_y))
+        ),
+        (
+            ("<", nav_callback(SimpleCalAct.prev_m)),
+            (months[month - 1], ignore_callback),
+            (">", nav_callback(SimpleCalAct.next_m))
+        ),
+        tuple((weekday, ignore_callback) for weekday in days_of_week),
+    ]
+
+    # Calendar rows - Days of month
+    day_cells = []
+    month_calendar = month_grid(year, month, first_weekday)
+    for week in month_calendar:
+        days_row = []
+        for day in week:
+            if day == 0:
+                days_row.append((" ", ignore_callback))
+                continue
+            day_cells.append((len(rows), len(days_row)))
+            days_row.append((
+                str(day), packer.pack(SimpleCalAct.day, year, month, day)
+            ))
+        rows.append(tuple(days_row))
+
+    # nav today & cancel button, keeps the last cell of month grid as a day like it always did
+    day = month_calendar[-1][-1]
+    rows.append((
+        (cancel_caption, packer.pack(SimpleCalAct.cancel, year, month, day)),
+        (" ", ignore_callback),
+        (today_caption, packer.pack(SimpleCalAct.today, year, month, day)),
+    ))
+    return KeyboardTemplate(
+        rows=tuple(rows), row_width=7, year=year, month=month,
+        year_cells=((year, (0, 1)),), month_cells=((month, (1, 1)),),
+        weekday_row=2, day_cells=tuple(day_cells), first_weekday=first_weekday
+    )
+
+
+def render_days(
+    labels: tuple, year: int, month: int, today: date, disabled_mask: int = 0,
+    packer: CallbackPacker = simple_packer, first_weekday: int = 0
+) -> RenderedKeyboard:
+    """Renders keyboard of month days as plain data, pure and synchronous
+
+    Safe to call from worker threads and processes, all arguments and the result can be pickled.
+
+    Parameters:
+    labels (tuple): (days_of_week, months, cancel_caption, today_caption), see GenericCalendar.labels_key()
+    today (date): day highlighted, user's today
+    disabled_mask (int): days which can not be selected, day N is bit N - 1
+    packer: callback packer, simple_packer or simple_codec for compact callbacks
+    first_weekday (int): day of week calendar weeks start with, 0 is Monday
+    """
+    template = _compile_days_template(labels, year, month, packer, first_weekday)
+    return RenderedKeyboard(apply_overlay(template, today, disabled_mask), template.row_width)
 
 
 class SimpleCalendar(GenericCalendar):
 
-    ignore_callback = SimpleCalendarCallback(act=SimpleCalAct.ignore).pack()  # placeholder for no answer buttons
+    ignore_callback = IGNORE_CALLBACK  # placeholder for no answer buttons
+    packer = simple_packer
+    compact_codec = simple_codec
 
     async def start_calendar(
         self,
-        year: int = datetime.now().year,
-        month: int = datetime.now().month
+        year: int = None,
+        month: int = None,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
     ) -> InlineKeyboardMarkup:
         """
         Creates an inline keyboard with the provided year and month
         :param int year: Year to use in the calendar, if None the current year is used.
         :param int month: Month to use in the calendar, if None the current month is used.
+        :param datetime min_date: Minimum date for this call, overrides set_dates_range().
+        :param datetime max_date: Maximum date for this call, overrides set_dates_range().
+        :param str tz: User's time zone name or tzinfo for this call, today is highlighted in it.
         :return: Returns InlineKeyboardMarkup object with the calendar.
         """
+        return self.render_calendar(year, month, min_date, max_date, tz)
 
-        today = datetime.now()
-        now_weekday = self._labels.days_of_week[today.weekday()]
-        now_month, now_year, now_day = today.month, today.year, today.day
-
-        def highlight_month():
-            month_str = self._labels.months[month - 1]
-            if now_month == month and now_year == year:
-                return highlight(month_str)
-            return month_str
-
-        def highlight_weekday():
-            if now_month == month and now_year == year and now_weekday == weekday:
-                return highlight(weekday)
-            return weekday
-
-        def format_day_string():
-            date_to_check = datetime(year, month, day)
-            if self.min_date and date_to_check < self.min_date:
-                return superscript(str(day))
-            elif self.max_date and date_to_check > self.max_date:
-                return superscript(str(day))
-            return str(day)
-
-        def highlight_day():
-            day_string = format_day_string()
-            if now_month == month and now_year == year and now_day == day:
-                return highlight(day_string)
-            return day_string
-
-        # building a calendar keyboard
-        kb = []
-
-        # inline_kb = InlineKeyboardMarkup(row_width=7)
-        # First row - Year
-        years_row = []
-        years_row.append(InlineKeyboardButton(
-            text="<<",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_y, year=year, month=month, day=1).pack()
-        ))
-        years_row.append(InlineKeyboardButton(
-            text=str(year) if year != now_year else highlight(year),
-            callback_data=self.ignore_callback
-        ))
-        years_row.append(InlineKeyboardButton(
-            text=">>",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_y, year=year, month=month, day=1).pack()
-        ))
-        kb.append(years_row)
+    def render_calendar(
+        self,
+        year: int = None,
+        month: int = None,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
+    ) -> InlineKeyboardMarkup:
+        """Synchronous start_calendar() for synchronous code and worker threads"""
+        today = self._today(tz)
+        return self._get_days_kb(year or today.year, month or today.month, today, min_date, max_date)
 
-        # Month nav Buttons
-        month_row = []
-        month_row.append(InlineKeyboardButton(
-            text="<",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_m, year=year, month=month, day=1).pack()
-        ))
-        month_row.append(InlineKeyboardButton(
-            text=highlight_month(),
-            callback_data=self.ignore_callback
-        ))
-        month_row.append(InlineKeyboardButton(
-            text=">",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_m, year=year, month=month, day=1).pack()
-        ))
-        kb.append(month_row)
-
-        # Week Days
-        week_days_labels_row = []
-        for weekday in self._labels.days_of_week:
-            week_days_labels_row.append(
-                InlineKeyboardButton(text=highlight_weekday(), callback_data=self.ignore_callback)
-            )
-        kb.append(week_days_labels_row)
-
-        # Calendar rows - Days of month
-        month_calendar = calendar.monthcalendar(year, month)
-
-        for week in month_calendar:
-            days_row = []
-            for day in week:
-                if day == 0:
-                    days_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-                    continue
-                days_row.append(InlineKeyboardButton(
-                    text=highlight_day(),
-                    callback_data=SimpleCalendarCallback(act=SimpleCalAct.day, year=year, month=month, day=day).pack()
-                ))
-            kb.append(days_row)
-
-        # nav today & cancel button
-        cancel_row = []
-        cancel_row.append(InlineKeyboardButton(
-            text=self._labels.cancel_caption,
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.cancel, year=year, month=month, day=day).pack()
-        ))
-        cancel_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-        cancel_row.append(InlineKeyboardButton(
-            text=self._labels.today_caption,
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.today, year=year, month=month, day=day).pack()
+    def _get_days_kb(
+        self, year: int, month: int, today: date, min_date: datetime = None, max_date: datetime = None
+    ) -> InlineKeyboardMarkup:
+        min_date, max_date = self._dates_range(min_date, max_date)
+        return self._markup('days', year, month, today, min_date, max_date, lambda: render_days(
+            self.labels_key(), year, month, today, self._disabled_mask(year, month, min_date, max_date),
+            self.callback_packer, self.first_weekday
         ))
-        kb.append(cancel_row)
-        return InlineKeyboardMarkup(row_width=7, inline_keyboard=kb)
 
-    async def _update_calendar(self, query: CallbackQuery, with_date: datetime):
-        await query.message.edit_reply_markup(
-            reply_markup=await self.start_calendar(int(with_date.year), int(with_date.month))
-        )
+    async def _update_calendar(
+        self, query: CallbackQuery, act: SimpleCalAct, ordinal: int, today: date, min_date: datetime, max_date: datetime
+    ):
+        year, month = from_month_ordinal(ordinal)
+        await self._navigate(query, act, lambda: self._get_days_kb(year, month, today, min_date, max_date))
 
-    async def process_selection(self, query: CallbackQuery, data: SimpleCalendarCallback) -> tuple:
+    async def process_selection(
+        self,
+        query: CallbackQuery,
+        data: SimpleCalendarCallback,
+        min_date: datetime = None,
+        max_date: datetime = None,
+        tz: TimeZone = None
+    ) -> tuple:
         """
         Process the callback_query. This method generates a new calendar if forward or
         backward is pressed. This method should be called inside a CallbackQueryHandler.
         :param query: callback_query, as provided by the CallbackQueryHandler
         :param data: callback_data, dictionary, set by calendar_callback
+        :param min_date: Minimum date for this call, overrides set_dates_range().
+        :param max_date: Maximum date for this call, overrides set_dates_range().
+        :param tz: User's time zone name or tzinfo for this call, Today button opens today's month there.
         :return: Returns a tuple (Boolean,datetime), indicating if a date is selected
                     and returning the date if so.
         """
         return_data = (False, None)
+        if self.metrics is not None:
+            self.metrics.count_action(type(self).__name__, data.act)
 
         # processing empty buttons, answering with no action
         if data.act == SimpleCalAct.ignore:
-            await query.answer(cache_time=60)
+            await self._answer(query, cache_time=60)
             return return_data
 
-        temp_date = datetime(int(data.year), int(data.month), 1)
+        if not 1 <= int(data.month) <= 12:
+            raise ValueError(f'month must be in 1..12, got {data.month}')
+        ordinal = month_ordinal(int(data.year), int(data.month))
 
         # user picked a day button, return date
         if data.act == SimpleCalAct.day:
-            return await self.process_day_select(data, query)
+            return await self.process_day_select(data, query, min_date, max_date)
+
+        today = self._today(tz)  # one date for the whole request
 
         # user navigates to previous year, editing message with new calendar
         if data.act == SimpleCalAct.prev_y:
-            prev_date = datetime(int(data.year) - 1, int(data.month), 1)
-            await self._update_calendar(query, prev_date)
+            await self._update_calendar(query, data.act, ordinal - 12, today, min_date, max_date)
         # user navigates to next year, editing message with new calendar
         if data.act == SimpleCalAct.next_y:
-            next_date = datetime(int(data.year) + 1, int(data.month), 1)
-            await self._update_calendar(query, next_date)
+            await self._update_calendar(query, data.act, ordinal + 12, today, min_date, max_date)
         # user navigates to previous month, editing message with new calendar
         if data.act == SimpleCalAct.prev_m:
-            prev_date = temp_date - timedelta(days=1)
-            await self._update_calendar(query, prev_date)
+            await self._update_calendar(query, data.act, ordinal - 1, today, min_date, max_date)
         # user navigates to next month, editing message with new calendar
         if data.act == SimpleCalAct.next_m:
-            next_date = temp_date + timedelta(days=31)
-            await self._update_calendar(query, next_date)
+            await self._update_calendar(query, data.act, ordinal + 1, today, min_date, max_date)
         if data.act == SimpleCalAct.today:
-            next_date = datetime.now()
-            if next_date.year != int(data.year) or next_date.month != int(data.month):
-                await self._update_calendar(query, datetime.now())
+            today_ordinal = month_ordinal(today.year, today.month)
+            if today_ordinal != ordinal:
+                await self._update_calendar(query, data.act, today_ordinal, today, min_date, max_date)
             else:
-                await query.answer(cache_time=60)
+                await self._answer(query, cache_time=60)
         if data.act == SimpleCalAct.cancel:
-            await query.message.delete_reply_markup()
+            await self._delete_markup(query)
         # at some point user clicks DAY button, returning date
         return return_data
@@ -0,0 +1,86 @@
+from datetime import date
+from typing import NamedTuple, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from .schemas import highlight, superscript
+
+
+Cell = Tuple[str, str]                  # (text, callback_data) of a button
+Position = Tuple[int, int]              # (row, column) of a button
+
+
+class RenderedKeyboard(NamedTuple):
+    """Keyboard as plain data, returned by pure renderers, can be pickled to and from worker processes"""
+    rows: list      # rows of (text, callback_data)
+    row_width: int
+
+
+class KeyboardTemplate(NamedTuple):
+    """Immutable part of calendar keyboard, everything that does not depend on today and dates range
+
+    Positions point to the cells an overlay may patch, the rest of cells are sent as is.
+    """
+    rows: Tuple[Tuple[Cell, ...], ...]
+    row_width: int
+    year: int
+    month: Optional[int] = None
+    year_cells: Tuple[Tuple[int, Position], ...] = ()       # (year, position) highlighted for current year
+    month_cells: Tuple[Tuple[int, Position], ...] = ()      # (month, position) highlighted for current month
+    weekday_row: Optional[int] = None                       # row with weekday captions
+    day_cells: Tuple[Position, ...] = ()                    # position of day N at index N - 1
+    first_weekday: int = 0                                  # weekday of the first column, 0 is Monday
+
+
+def apply_overlay(template: KeyboardTemplate, today: date, disabled_mask: int = 0) -> list:
+    """Returns rows of (text, callback_data) with today highlighted and disabled days patched
+
+    Day N of month is disabled when bit N - 1 of disabled_mask is set.
+    """
+    rows = [list(row) for row in template.rows]
+
+    def patch(position: Position, text: str) -> None:
+        row, col = position
+        rows[row][col] = (text, rows[row][col][1])
+
+    def text_at(position: Position) -> str:
+        return rows[position[0]][position[1]][0]
+
+    for year, position in template.year_cells:
+        if year == today.year:
+            patch(position, highlight(year))
+
+    for month, position in template.month_cells:
+        if month == today.month and template.year == today.year:
+            patch(position, highlight(text_at(position)))
+
+    while disabled_mask:
+        day = disabled_mask.bit_length()
+        disabled_mask ^= 1 << (day - 1)
+        patch(template.day_cells[day - 1], superscript(str(day)))
+
+    if template.month == today.month and template.year == today.year:
+        if template.weekday_row is not None:
+            position = (template.weekday_row, (today.weekday() - template.first_weekday) % 7)
+            patch(position, highlight(text_at(position)))
+        if template.day_cells:
+            position = template.day_cells[today.day - 1]
+            patch(position, highlight(text_at(position)))
+
+    return rows
+
+
+def to_markup(rows: list, row_width: int) -> InlineKeyboardMarkup:
+    """Builds keyboard markup from rows of (text, callback_data)"""
+    return InlineKeyboardMarkup(
+        row_width=row_width,
+        inline_keyboard=[
+            [InlineKeyboardButton(text=text, callback_data=callback_data) for text, callback_data in row]
+            for row in rows
+        ]
+    )
+
+
+def copy_markup(markup: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+    """Copy of cached markup with rows of its own, rows can be added, removed or replaced, buttons are shared"""
+    return markup.model_copy(update={'inline_keyboard': [list(row) for row in markup.inline_keyboard]})
@@ -0,0 +1,91 @@
+import gzip
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[2] / 'benchmarks' / 'analyze_log.py'
+
+OLD = """\
+2024-12-03 03:48:33,312 - aiogram.dispatcher - INFO - Start polling
+2024-12-03 03:48:46,945 - aiogram.event - INFO - Update id=1 is handled. Duration 823 ms by bot id=7
+2024-12-03 03:49:01,000 - aiogram.event - INFO - Update id=2 is not handled. Duration 10 ms by bot id=7
+2024-12-03 03:50:00,000 - aiogram.dispatcher - WARNING - Received SIGINT signal
+2024-12-03 03:50:00,001 - aiogram.dispatcher - INFO - Polling stopped for bot @bot id=7 - 'bot'
+2024-12-03 03:50:00,002 - aiogram.dispatcher - INFO - Polling stopped
+"""
+NEW = """\
+2024-12-03 03:51:00,002 - aiogram.dispatcher - INFO - Start polling
+2024-12-03 03:51:05,000 - aiogram.dispatcher - ERROR - Failed to fetch updates - TelegramNetworkError: timeout
+2024-12-03 03:56:10,000 - aiogram.event - INFO - Update id=3 is handled. Duration 230 ms by bot id=7
+2024-12-03 03:56:20,000 - aiogram.event - INFO - Update id=4 is handled. Duration 240 ms by bot id=7
+not a log line
+"""
+
+
+@pytest.fixture
+def rotated_logs(tmp_path):
+    current, old = tmp_path / 'bot.log', tmp_path / 'bot.log.1.gz'
+    current.write_text(NEW, encoding='utf-8')
+    with gzip.open(old, 'wt', encoding='utf-8') as file:
+        file.write(OLD)
+    return [str(current), str(old)]
+
+
+def load_analyzer():
+    spec = importlib.util.spec_from_file_location('analyze_log', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_report(rotated_logs):
+    report = load_analyzer().analyze(rotated_logs, window=300, slow_ms=500, top=2)
+    assert report['first'] == '2024-12-03 03:48:46.945'
+    assert (report['handled'], report['not_handled'], report['handled_ratio']) == (3, 1, 0.75)
+    assert report['latency']['count'] == 4
+    assert report['latency']['max_ms'] == 823
+    assert report['slow'] == 1
+    assert [update['update_id'] for update in report['slowest']] == [1, 4]
+    assert report['polling'] == {
+        'starts': 2, 'restarts': 1, 'stops': 1, 'signals': 1, 'fetch_errors': 1, 'downtime_s': 60.0
+    }
+    assert [(window['start'], window['count']) for window in report['windows']] == [
+        ('2024-12-03 03:45:00', 2), ('2024-12-03 03:55:00', 2)
+    ]
+
+
+def test_percentiles_within_bucket_error():
+    histogram = load_analyzer().Histogram()
+    for value in range(1, 1001):
+        histogram.add(value)
+    assert histogram.percentile(0.5) == pytest.approx(500, rel=0.01)
+    assert histogram.percentile(0.99) == pytest.approx(990, rel=0.01)
+    assert histogram.percentile(1) == 1000
+
+
+def test_cli_json(rotated_logs):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), *rotated_logs, '--json', '-w', '3600'], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    *windows, report = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [window['type'] for window in windows] == ['window']
+    assert windows[0]['not_handled'] == 1
+    assert report['type'] == 'report'
+    assert report['handled'] == 3
+
+
+def test_windows_are_reported_as_they_are_over(rotated_logs):
+    module = load_analyzer()
+    windows = []
+    analyzer = module.LogAnalyzer(window=300, on_window=windows.append)
+    for line in module.log_lines(rotated_logs):
+        analyzer.feed(line)
+        if 'Update id=3 ' in line:
+            assert [window['start'] for window in windows] == ['2024-12-03 03:45:00']
+    analyzer.finish()
+    assert [window['count'] for window in windows] == [2, 2]
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARK = Path(__file__).resolve().parents[2] / 'benchmarks' / 'bench_calendar.py'
+
+
+def run_benchmark(*args):
+    return subprocess.run(
+        [sys.executable, str(BENCHMARK), '-n', '1', '-r', '1', *args], capture_output=True, text=True
+    )
+
+
+def test_benchmark_json_and_baseline(tmp_path):
+    result = run_benchmark('-k', 'DAY,en,')
+    assert result.returncode == 0, result.stderr
+    cases = json.loads(result.stdout)['cases']
+    assert set(cases) >= {
+        f'{prefix}.process_selection[{act},en,{range_name}]'
+        for prefix, act in (('simple', 'DAY'), ('dialog', 'SET-DAY')) for range_name in ('no-range', 'range')
+    }
+
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'cases': {name: {'median_us': 1e-6} for name in cases}}))
+    result = run_benchmark('-k', 'DAY,en,', '-b', str(baseline))
+    assert result.returncode == 1
+    assert len(json.loads(result.stdout)['regressions']) == len(cases)
+    assert 'REGRESSION' in result.stderr
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+
+from aiogram_calendar import SimpleCalendar, CalendarRegistry
+from aiogram_calendar.bulk import Recipient, broadcast, render_many
+from aiogram_calendar.clock import FixedClock
+
+
+@pytest.mark.asyncio
+async def test_render_many_groups():
+    recipients = [
+        Recipient(1, 'en', 2024, 5),
+        Recipient(2, 'en-GB', 2024, 5),
+        Recipient(3, 'ru', 2024, 5),
+        Recipient(4, 'en', 2024, 5, min_date=datetime(2024, 5, 10)),
+        Recipient(5, 'en', 2024, 5),
+    ]
+    markups = await render_many(SimpleCalendar, recipients, CalendarRegistry())
+    assert markups[0] is markups[1] is markups[4]
+    assert len({id(markup) for markup in markups}) == 3
+    assert markups[2].inline_keyboard[1][1].text == 'Май'
+
+
+@pytest.mark.asyncio
+async def test_render_many_groups_zones_by_local_date():
+    clock = FixedClock(datetime(2024, 5, 10, 20, tzinfo=timezone.utc))
+    recipients = [
+        Recipient(1, 'en', tz='Europe/Berlin'),
+        Recipient(2, 'en', tz='Europe/Kyiv'),
+        Recipient(3, 'en', tz='Pacific/Auckland'),     # already May 11 there
+    ]
+    markups = await render_many(SimpleCalendar, recipients, CalendarRegistry(), clock=clock)
+    assert markups[0] is markups[1]
+    assert markups[2] is not markups[0]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_bounded_and_reports_failures():
+    in_flight = peak = tasks = 0
+
+    async def send_message(chat_id, text, reply_markup):
+        nonlocal in_flight, peak, tasks
+        in_flight += 1
+        peak = max(peak, in_flight)
+        tasks = max(tasks, len(asyncio.all_tasks()))
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        if chat_id % 10 == 0:
+            raise TelegramForbiddenError(method=AsyncMock(), message='bot was blocked by the user')
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = send_message
+    recipients = [Recipient(chat_id, 'en' if chat_id % 2 else 'ru', 2024, 5) for chat_id in range(1, 101)]
+    result = await broadcast(
+        bot, SimpleCalendar, recipients, lambda recipient: f'Hi {recipient.chat_id}',
+        concurrency=5, registry=CalendarRegistry()
+    )
+    assert peak == 5
+    assert tasks <= 6   # workers and the test itself, not a task per recipient
+    assert result.sent == 90 and result.groups == 2
+    assert sorted(result.failed) == list(range(10, 101, 10))
+    assert isinstance(result.failed[10], TelegramForbiddenError)
+    assert bot.send_message.await_args_list[0].kwargs['text'] == 'Hi 1'
+
+
+@pytest.mark.asyncio
+async def test_broadcast_counts_every_failed_message():
+    bot = AsyncMock()
+    blocked = TelegramForbiddenError(method=AsyncMock(), message='bot was blocked by the user')
+    bot.send_message.side_effect = [None, blocked, None, KeyError()]
+    recipients = [Recipient(1), Recipient(2), Recipient(1), Recipient(2)]
+    result = await broadcast(bot, SimpleCalendar, recipients, 'Hi', concurrency=1, registry=CalendarRegistry())
+    assert result.sent == 2
+    assert list(result.failed) == [2] and isinstance(result.failed[2], KeyError)
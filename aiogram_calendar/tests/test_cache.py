@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from aiogram.types import InlineKeyboardButton
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar, RenderCache
+
+
+def test_lru_eviction():
+    evicted = []
+    cache = RenderCache(maxsize=2, on_evict=lambda key, value: evicted.append(key))
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert evicted == ['b']
+    assert 'b' not in cache
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 0, 'evictions': 1}
+
+
+def test_ttl():
+    now = [0.0]
+    cache = RenderCache(ttl=10, timer=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 5
+    assert cache.get('a') == 1
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.misses == 1 and cache.evictions == 1
+
+
+def test_invalidate():
+    cache = RenderCache()
+    cache.put(('x', 1), 1)
+    cache.put(('y', 2), 2)
+    assert cache.invalidate(lambda key: key[0] == 'x') == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_simple_calendar_cached():
+    cache = RenderCache()
+    first = await SimpleCalendar(cache=cache).start_calendar(2022, 2)
+    second = await SimpleCalendar(cache=cache).start_calendar(2022, 2)
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # different locale and dates range must not share keyboards
+    await SimpleCalendar(locale='ru', cache=cache).start_calendar(2022, 2)
+    ranged = SimpleCalendar(cache=cache)
+    ranged.set_dates_range(datetime(2022, 2, 5), datetime(2022, 2, 20))
+    await ranged.start_calendar(2022, 2)
+    assert cache.misses == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_markup_changes_are_not_shared():
+    cache = RenderCache()
+    calendar = SimpleCalendar(cache=cache)
+    first = await calendar.start_calendar(2024, 5)
+    rows = len(first.inline_keyboard)
+    first.inline_keyboard.append([InlineKeyboardButton(text='Back', callback_data='back')])
+    second = await calendar.start_calendar(2024, 5)
+    second.inline_keyboard[0] = []
+    assert cache.hits == 1
+    assert len((await calendar.start_calendar(2024, 5)).inline_keyboard) == rows
+    assert second.inline_keyboard[-1][0].text != 'Back'
+
+
+@pytest.mark.asyncio
+async def test_dialog_calendar_cached():
+    cache = RenderCache()
+    dialog = DialogCalendar(cache=cache)
+    for _ in range(2):
+        await dialog.start_calendar(2022)
+        await dialog.start_calendar(2022, 5)
+        await dialog._get_month_kb(2022)
+    assert (cache.hits, cache.misses) == (3, 3)
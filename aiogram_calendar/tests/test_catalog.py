@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from aiogram_calendar import SimpleCalendar
+from aiogram_calendar.catalog import (
+    BinaryCatalog, LocaleCatalog, LOCALES_DIR, compile_catalog, compile_directory, load_json
+)
+from aiogram_calendar.localization import Localization
+from aiogram_calendar.schemas import CalendarLabels
+
+
+def test_bundled_languages():
+    languages = Localization.get_available_languages()
+    assert len(languages) >= 30
+    assert {'en', 'ru', 'uk', 'de', 'ja'} <= set(languages)
+
+
+def test_catalog_loads_on_first_use(tmp_path):
+    (tmp_path / 'xx.json').write_text(json.dumps({'today': 'Xx'}))
+    catalog = LocaleCatalog([tmp_path])
+    assert 'xx' in catalog
+    assert catalog._loaded == {}
+    assert catalog.load('xx') is catalog.load('xx')
+    assert catalog.load('yy') is None
+
+
+def test_compiled_catalog_matches_sources(tmp_path):
+    output = compile_directory(LOCALES_DIR, tmp_path / 'catalog.bin')
+    binary = BinaryCatalog(output)
+    try:
+        assert set(binary.languages()) == {path.stem for path in LOCALES_DIR.glob('*.json')}
+        for language in binary.languages():
+            assert binary.load(language) == load_json(LOCALES_DIR / f'{language}.json')
+    finally:
+        binary.close()
+
+
+def set_mtime(path, seconds):
+    os.utime(path, (seconds, seconds))
+
+
+def test_compiled_catalog_preferred(tmp_path):
+    source = tmp_path / 'xx.json'
+    source.write_text(json.dumps({'today': 'Source'}))
+    set_mtime(source, 1000)
+    compile_catalog({'xx': {'today': 'Compiled'}}, tmp_path / 'catalog.bin')
+    set_mtime(tmp_path / 'catalog.bin', 2000)
+    assert LocaleCatalog([tmp_path]).load('xx') == {'today': 'Compiled'}
+
+
+def test_stale_compiled_catalog_ignored(tmp_path):
+    source = tmp_path / 'xx.json'
+    source.write_text(json.dumps({'today': 'Compiled'}))
+    compile_directory(tmp_path)
+    set_mtime(tmp_path / 'catalog.bin', 1000)
+    source.write_text(json.dumps({'today': 'Edited'}))
+    set_mtime(source, 2000)
+    assert LocaleCatalog([tmp_path]).load('xx') == {'today': 'Edited'}
+
+
+def test_compiled_catalogs_reused_on_rescan(tmp_path):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    for path, language in ((first, 'xx'), (second, 'yy')):
+        path.mkdir()
+        (path / f'{language}.json').write_text(json.dumps({'today': language}))
+        compile_directory(path)
+    catalog = LocaleCatalog([first])
+    binary = catalog._scan()['xx']
+    catalog.add_path(second)
+    assert catalog._scan()['xx'] is binary
+    assert catalog.load('yy') == {'today': 'yy'}
+
+    # recompiled catalog is mapped again, the old map is closed
+    set_mtime(first / 'catalog.bin', 5000)
+    catalog.add_path(tmp_path / 'missing')
+    assert catalog._scan()['xx'] is not binary
+    assert binary._map.closed
+
+
+def test_bad_pack(tmp_path):
+    (tmp_path / 'xx.json').write_text(json.dumps({'days': ['Mo']}))
+    with pytest.raises(ValueError):
+        LocaleCatalog([tmp_path]).load('xx')
+
+
+def test_calendar_labels_from_catalog():
+    labels = CalendarLabels.for_language('de_DE')
+    assert labels.months[2] == 'März'
+    assert labels.days_of_week[0] == 'Mo'
+    assert labels.today_caption == 'Heute'
+    assert SimpleCalendar(locale='de')._labels == labels
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar, RenderCache
+from aiogram_calendar.clock import FixedClock
+
+
+@pytest.mark.asyncio
+async def test_defaults_follow_clock():
+    clock = FixedClock(datetime(2023, 1, 31, 23, 59))
+    calendar = SimpleCalendar(clock=clock)
+    kb = (await calendar.start_calendar()).inline_keyboard
+    assert kb[0][1].text == '[2023]'
+    assert kb[1][1].text == '[January]'
+
+    clock.advance(minutes=1)
+    kb = (await calendar.start_calendar()).inline_keyboard
+    assert kb[1][1].text == '[February]'
+
+    kb = (await DialogCalendar(clock=clock).start_calendar()).inline_keyboard
+    assert kb[0][2].text == '[2023]'
+
+
+@pytest.mark.asyncio
+async def test_cache_rolls_over_at_midnight():
+    clock = FixedClock(datetime(2023, 5, 10, 23, 59, tzinfo=timezone.utc))
+    cache = RenderCache()
+    calendar = SimpleCalendar(cache=cache, clock=clock)
+    before = await calendar.start_calendar(2023, 5)
+    assert await calendar.start_calendar(2023, 5) == before and cache.hits == 1
+
+    clock.advance(minutes=1)
+    after = await calendar.start_calendar(2023, 5)
+    assert after != before and cache.hits == 1
+    assert after.inline_keyboard[4][3].text == '[11]'
+    # May 10 is not over in UTC-12 yet
+    assert len(cache) == 2 and cache.day == date(2023, 5, 10)
+
+    clock.advance(hours=12)
+    await calendar.start_calendar(2023, 5)
+    assert len(cache) == 1 and cache.evictions == 1
+
+
+def test_roll_over_keeps_other_keys():
+    cache = RenderCache()
+    cache.put(('days', date(2023, 5, 9)), 1)
+    cache.put(('days', date(2023, 5, 10)), 2)
+    cache.put('custom', 3)
+    assert cache.roll_over(date(2023, 5, 10)) == 1
+    assert cache.roll_over(date(2023, 5, 10)) == 0
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_time_zone():
+    # 2023-05-10 23:30 UTC is already May 11 in Kyiv and still May 10 in New York
+    clock = FixedClock(datetime(2023, 5, 10, 23, 30, tzinfo=timezone.utc))
+    cache = RenderCache()
+    calendar = SimpleCalendar(cache=cache, clock=clock)
+    kyiv = await calendar.start_calendar(2023, 5, tz='Europe/Kyiv')
+    assert kyiv.inline_keyboard[4][3].text == '[11]'
+    new_york = await calendar.start_calendar(2023, 5, tz='America/New_York')
+    assert new_york.inline_keyboard[4][2].text == '[10]'
+
+    # keyboards are shared by local date, not by zone
+    assert await calendar.start_calendar(2023, 5, tz='Europe/Helsinki') == kyiv
+    assert await SimpleCalendar(cache=cache, clock=clock, tz='America/Chicago').start_calendar(2023, 5) == new_york
+    assert len(cache) == 2
@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from aiogram_calendar import SimpleCalendar, EditCoalescer
+from aiogram_calendar.schemas import SimpleCalendarCallback
+
+
+@pytest.mark.asyncio
+async def test_only_latest_pending_edit_is_sent():
+    coalescer = EditCoalescer()
+    sent = []
+
+    def edit(view):
+        async def send():
+            await asyncio.sleep(0.01)
+            sent.append(view)
+        return send
+
+    results = await asyncio.gather(*(coalescer.submit((1, 1), edit(view)) for view in range(5)))
+    assert results == [True, False, False, False, True]
+    assert sent == [0, 4]
+    assert (coalescer.sent, coalescer.dropped, len(coalescer)) == (2, 3, 0)
+
+
+@pytest.mark.asyncio
+async def test_final_edit_is_never_dropped():
+    coalescer = EditCoalescer()
+    sent = []
+
+    def edit(view):
+        async def send():
+            await asyncio.sleep(0)
+            sent.append(view)
+        return send
+
+    results = await asyncio.gather(
+        coalescer.submit((1, 1), edit('nav')),
+        coalescer.submit((1, 1), edit('delete'), final=True),
+        coalescer.submit((1, 1), edit('late nav')),
+        coalescer.submit((2, 1), edit('other message')),
+    )
+    assert results == [True, True, False, True]
+    assert sent == ['nav', 'other message', 'delete']
+
+
+@pytest.mark.asyncio
+async def test_tap_after_selection_is_only_answered():
+    calendar = SimpleCalendar(coalescer=EditCoalescer())
+    query = AsyncMock()
+    query.message.chat.id, query.message.message_id = 1, 1
+
+    async def slow_delete():
+        await asyncio.sleep(0.01)
+    query.message.delete_reply_markup.side_effect = slow_delete
+
+    await asyncio.gather(
+        calendar.process_selection(query, SimpleCalendarCallback(act='DAY', year=2024, month=1, day=10)),
+        calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1)),
+    )
+    query.message.delete_reply_markup.assert_awaited_once()
+    query.message.edit_reply_markup.assert_not_awaited()
+    query.answer.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_superseded_taps_are_answered():
+    calendar = SimpleCalendar(coalescer=EditCoalescer())
+    query = AsyncMock()
+    query.message.chat.id, query.message.message_id = 1, 1
+
+    async def slow_edit(reply_markup):
+        await asyncio.sleep(0.01)
+    query.message.edit_reply_markup.side_effect = slow_edit
+
+    await asyncio.gather(*(
+        calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=month, day=1))
+        for month in range(1, 5)
+    ))
+    assert query.message.edit_reply_markup.await_count == 2
+    assert query.answer.await_count == 2
+    last = query.message.edit_reply_markup.await_args.kwargs['reply_markup']
+    assert last.inline_keyboard[1][1].text == 'May'
@@ -0,0 +1,86 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.types import CallbackQuery
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar
+from aiogram_calendar.compact import CalendarCallbackFilter, simple_codec, dialog_codec, fast_unpack, to_base36
+from aiogram_calendar.schemas import SimpleCalendarCallback, DialogCalendarCallback, SimpleCalAct, DialogCalAct
+
+
+def test_base36():
+    for value in (0, 35, 36, 739232):
+        assert int(to_base36(value), 36) == value
+
+
+@pytest.mark.parametrize("codec, callback_cls, acts", [
+    (simple_codec, SimpleCalendarCallback, SimpleCalAct),
+    (dialog_codec, DialogCalendarCallback, DialogCalAct),
+])
+def test_codec_round_trip(codec, callback_cls, acts):
+    for act in acts:
+        packed = codec.pack(act, 2024, 12, 12)
+        assert len(packed) <= 8
+        data = codec.unpack(packed)
+        assert isinstance(data, callback_cls)
+        assert data.act is act
+        if data.year is not None:
+            assert data.year == 2024
+        if data.month not in (None, -1, 1):
+            assert data.month == 12
+
+
+def test_dialog_codec_restores_constants():
+    # dialog calendar always packs the same constants, so compact callbacks decode to the same data
+    for act, month, day in [
+        (DialogCalAct.set_y, -1, -1), (DialogCalAct.next_y, 1, 1), (DialogCalAct.cancel, 1, 1),
+        (DialogCalAct.set_m, 5, -1), (DialogCalAct.day, 5, 17),
+    ]:
+        expected = DialogCalendarCallback(act=act, year=2024, month=month, day=day)
+        assert dialog_codec.unpack(dialog_codec.pack(act, 2024, month, day)) == expected
+
+
+@pytest.mark.parametrize("value", ['sc:', 'sc:X1', 'sc:Dzzzzzzzzzzzz', 'sc:I1', 'simple_calendar:DAY:x:1:1'])
+def test_malformed(value):
+    with pytest.raises(ValueError):
+        if value.startswith('sc:'):
+            simple_codec.unpack(value)
+        else:
+            fast_unpack(SimpleCalendarCallback, value)
+
+
+def _query(data):
+    return Mock(spec=CallbackQuery, data=data)
+
+
+@pytest.mark.asyncio
+async def test_filter():
+    flt = CalendarCallbackFilter(simple_codec)
+    result = await flt(_query(simple_codec.pack(SimpleCalAct.day, 2024, 12, 12)))
+    assert result['callback_data'] == SimpleCalendarCallback(act=SimpleCalAct.day, year=2024, month=12, day=12)
+
+    regular = SimpleCalendarCallback(act=SimpleCalAct.prev_m, year=2024, month=12, day=1)
+    assert (await flt(_query(regular.pack())))['callback_data'] == regular
+
+    assert await flt(_query('dialog_calendar:SET-DAY:2024:12:12')) is False
+    assert await flt(_query(dialog_codec.pack(DialogCalAct.day, 2024, 12, 12))) is False
+    assert await flt(_query(None)) is False
+
+
+@pytest.mark.asyncio
+async def test_compact_calendars():
+    flt = CalendarCallbackFilter(simple_codec)
+    markup = await SimpleCalendar(compact=True).start_calendar(2024, 12)
+    for row in markup.inline_keyboard:
+        for button in row:
+            assert button.callback_data.startswith('sc:')
+            assert await flt(_query(button.callback_data))
+
+    day_button = markup.inline_keyboard[3][6]
+    data = (await flt(_query(day_button.callback_data)))['callback_data']
+    result = await SimpleCalendar(compact=True).process_selection(AsyncMock(), data)
+    assert result == (True, datetime(2024, 12, int(day_button.text)))
+
+    markup = await DialogCalendar(compact=True).start_calendar(2024)
+    assert all(button.callback_data.startswith('dc:') for row in markup.inline_keyboard for button in row)
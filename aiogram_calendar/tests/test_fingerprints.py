@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from aiogram_calendar import DialogCalendar, SimpleCalendar
+from aiogram_calendar.clock import FixedClock
+from aiogram_calendar.fingerprints import MarkupFingerprints, markup_fingerprint
+from aiogram_calendar.markup import PackedMarkup
+from aiogram_calendar.schemas import DialogCalendarCallback, SimpleCalendarCallback
+
+
+def make_query(chat_id=1, message_id=10, reply_markup=None):
+    query = AsyncMock()
+    query.message.chat.id = chat_id
+    query.message.message_id = message_id
+    query.message.reply_markup = reply_markup
+    return query
+
+
+@pytest.mark.asyncio
+async def test_packed_and_regular_markup_fingerprints_match():
+    clock = FixedClock(datetime(2024, 3, 5, tzinfo=timezone.utc))
+    regular = await SimpleCalendar(clock=clock).start_calendar(2024, 3)
+    packed = await SimpleCalendar(clock=clock, packed=True).start_calendar(2024, 3)
+    assert isinstance(packed, PackedMarkup)
+    assert markup_fingerprint(regular) == markup_fingerprint(packed)
+    assert markup_fingerprint(regular) != markup_fingerprint(await SimpleCalendar(clock=clock).start_calendar(2024, 4))
+
+
+@pytest.mark.asyncio
+async def test_repeated_taps_edit_once():
+    fingerprints = MarkupFingerprints()
+    calendar = DialogCalendar(fingerprints=fingerprints)
+    query = make_query()
+    data = DialogCalendarCallback(act='SET-YEAR', year=2024, month=-1, day=-1)
+    for _ in range(3):
+        await calendar.process_selection(query, data)
+    assert query.message.edit_reply_markup.await_count == 1
+    assert query.answer.await_count == 2
+    assert fingerprints.suppressed == 2
+
+    # keyboard removed, next edit is sent
+    await calendar.process_selection(query, DialogCalendarCallback(act='CANCEL', year=2024, month=1, day=1))
+    assert len(fingerprints) == 0
+
+
+@pytest.mark.asyncio
+async def test_start_on_shown_years_is_skipped():
+    clock = FixedClock(datetime(2024, 3, 5, tzinfo=timezone.utc))
+    calendar = DialogCalendar(clock=clock, fingerprints=MarkupFingerprints())
+    # message was sent with start_calendar() by the bot, so it is not in store yet
+    query = make_query(reply_markup=await calendar.start_calendar(2024))
+    await calendar.process_selection(query, DialogCalendarCallback(act='START', year=2024, month=-1, day=-1))
+    query.message.edit_reply_markup.assert_not_awaited()
+    query.answer.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_messages_are_separate():
+    fingerprints = MarkupFingerprints(maxsize=1)
+    calendar = SimpleCalendar(fingerprints=fingerprints)
+    data = SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1)
+    first, second = make_query(message_id=1), make_query(message_id=2)
+    await calendar.process_selection(first, data)
+    await calendar.process_selection(second, data)
+    assert len(fingerprints) == 1
+    second.message.edit_reply_markup.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_keyboard_of_query_takes_priority_over_store():
+    clock = FixedClock(datetime(2024, 3, 5, tzinfo=timezone.utc))
+    fingerprints = MarkupFingerprints()
+    calendar = DialogCalendar(clock=clock, fingerprints=fingerprints)
+    years = await calendar.start_calendar(2024)
+    # store says years are shown, but the message was edited elsewhere since
+    fingerprints.put((1, 10), markup_fingerprint(years))
+    query = make_query(reply_markup=await calendar._get_month_kb(2024))
+    await calendar.process_selection(query, DialogCalendarCallback(act='START', year=2024, month=-1, day=-1))
+    query.message.edit_reply_markup.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_not_modified_error_is_answered():
+    calendar = SimpleCalendar(fingerprints=MarkupFingerprints())
+    query = make_query()
+    query.message.edit_reply_markup.side_effect = TelegramBadRequest(
+        method=None, message='Bad Request: message is not modified'
+    )
+    await calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1))
+    query.answer.assert_awaited_once()
+    assert calendar.fingerprints.suppressed == 1
@@ -0,0 +1,54 @@
+import calendar
+from unittest.mock import AsyncMock
+
+import pytest
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar
+from aiogram_calendar.grid import month_grid, month_ordinal, from_month_ordinal
+from aiogram_calendar.schemas import SimpleCalendarCallback
+
+
+@pytest.mark.parametrize("first_weekday", [0, 6])
+def test_month_grid(first_weekday):
+    month_calendar = calendar.Calendar(first_weekday)
+    for year in range(1999, 2030):
+        for month in range(1, 13):
+            expected = tuple(tuple(week) for week in month_calendar.monthdayscalendar(year, month))
+            assert month_grid(year, month, first_weekday) == expected
+
+
+def test_month_ordinal():
+    assert from_month_ordinal(month_ordinal(2024, 12) + 1) == (2025, 1)
+    assert from_month_ordinal(month_ordinal(2024, 1) - 1) == (2023, 12)
+
+
+@pytest.mark.asyncio
+async def test_sunday_first():
+    markup = await SimpleCalendar(first_weekday=6).start_calendar(2024, 12)
+    kb = markup.inline_keyboard
+    assert [button.text for button in kb[2]] == ['Su', 'Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa']
+    # December 2024 starts on Sunday
+    assert kb[3][0].text == '1'
+
+    markup = await DialogCalendar(first_weekday=6).start_calendar(2024, 12)
+    assert markup.inline_keyboard[1][0].text == 'Su'
+    assert markup.inline_keyboard[2][0].text == '1'
+
+
+testset = [
+    ('PREV-MONTH', 2024, 1, '2023', 'December'),
+    ('NEXT-MONTH', 2024, 12, '2025', 'January'),
+    ('PREV-YEAR', 2024, 3, '2023', 'March'),
+    ('NEXT-YEAR', 2024, 3, '2025', 'March'),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("act, year, month, expected_year, expected_month", testset)
+async def test_navigation(act, year, month, expected_year, expected_month):
+    query = AsyncMock()
+    data = SimpleCalendarCallback(act=act, year=year, month=month, day=1)
+    await SimpleCalendar().process_selection(query, data)
+    kb = query.message.edit_reply_markup.call_args.kwargs['reply_markup'].inline_keyboard
+    assert kb[0][1].text == expected_year
+    assert kb[1][1].text == expected_month
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import aiogram_calendar
+
+# cumulative time of `import aiogram_calendar` in a fresh interpreter, eager imports took seconds
+IMPORT_BUDGET_MS = float(os.environ.get('AIOGRAM_CALENDAR_IMPORT_BUDGET_MS', 50))
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, '-c', code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(aiogram_calendar.__file__))
+    )
+
+
+def import_time_ms() -> float:
+    """Best of a few runs of -X importtime, cumulative microseconds of aiogram_calendar line"""
+    results = []
+    for _ in range(3):
+        stderr = run_python('import aiogram_calendar', '-X', 'importtime').stderr
+        line = next(line for line in stderr.splitlines() if line.rstrip().endswith('| aiogram_calendar'))
+        results.append(int(line.split('|')[1]) / 1000)
+    return min(results)
+
+
+def test_import_time_budget():
+    elapsed = import_time_ms()
+    assert elapsed < IMPORT_BUDGET_MS, f'import aiogram_calendar took {elapsed:.1f} ms, budget {IMPORT_BUDGET_MS} ms'
+
+
+def test_date_helpers_do_not_import_aiogram():
+    code = (
+        'import sys, aiogram_calendar.rules, aiogram_calendar.grid, aiogram_calendar.cache;'
+        'print(sorted(name for name in ("aiogram", "pydantic") if name in sys.modules))'
+    )
+    assert run_python(code).stdout.strip() == '[]'
+
+
+def test_lazy_exports():
+    for name in aiogram_calendar.__all__:
+        assert getattr(aiogram_calendar, name) is not None
+    assert set(aiogram_calendar.__all__) <= set(dir(aiogram_calendar))
+    with pytest.raises(AttributeError):
+        aiogram_calendar.missing
@@ -0,0 +1,60 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+
+BENCHMARKS = Path(__file__).resolve().parents[2] / 'benchmarks'
+
+
+def load_fake_api():
+    spec = importlib.util.spec_from_file_location('fake_bot_api', BENCHMARKS / 'fake_bot_api.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.FakeBotAPI
+
+
+@pytest.mark.asyncio
+async def test_fake_api_calls_and_rate_limit():
+    api = load_fake_api()(rate_limit=1.0, retry_after=3)
+    url = await api.start()
+    bot = Bot('42:TEST', session=AiohttpSession(api=TelegramAPIServer.from_base(url)))
+    try:
+        assert (await bot.get_me()).id == 42
+        api.push_update({'message': {
+            'message_id': 1, 'date': 0, 'chat': {'id': 7, 'type': 'private'}, 'text': 'hi'
+        }})
+        [update] = await bot.get_updates(offset=0, timeout=1)
+        assert update.message.text == 'hi'
+        assert await bot.get_updates(offset=update.update_id + 1) == []
+
+        with pytest.raises(TelegramRetryAfter) as error:
+            await bot.send_message(7, 'hello')
+        assert error.value.retry_after == 3
+        api.rate_limit = 0
+        message = await bot.send_message(7, 'hello')
+        assert (message.chat.id, message.text) == (7, 'hello')
+        assert api.stats()['limited'] == {'sendMessage': 1}
+    finally:
+        await bot.session.close()
+        await api.stop()
+
+
+def test_load_generator_report():
+    result = subprocess.run(
+        [sys.executable, str(BENCHMARKS / 'load_bot.py'), '--rate', '20', '--duration', '1', '--seed', '1'],
+        capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report['sent'] == report['completed'] == 20
+    assert report['statuses'] == {'handled': 20}
+    assert ' - ERROR - ' not in result.stderr    # example bot handlers log and swallow their errors
+    assert 0 < report['latency']['p50_ms'] <= report['latency']['p99_ms']
+    assert report['api']['calls']['sendMessage'] > 0
@@ -0,0 +1,52 @@
+from unittest.mock import Mock
+
+import pytest
+
+from aiogram_calendar import get_user_language, get_user_locale
+from aiogram_calendar.localization import Localization, resolve_language
+
+testset = [
+    ('en', 'en'),
+    ('ru', 'ru'),
+    ('RU', 'ru'),
+    ('ru_RU', 'ru'),
+    ('en-GB', 'en'),
+    ('uk', 'uk'),
+    ('uk_UA.UTF-8', 'uk'),
+    ('pt-br', 'pt'),
+    ('no', 'nb'),
+    ('tt', 'ru'),
+    ('xx-yy', 'en'),
+    ('', 'en'),
+    (None, 'en'),
+]
+
+
+@pytest.mark.parametrize("code, expected", testset)
+def test_resolve_language(code, expected):
+    assert resolve_language(code) == expected
+    assert Localization(code).language == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("code, expected", testset)
+async def test_get_user_language(code, expected):
+    assert await get_user_language(Mock(language_code=code)) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("code, expected", [
+    ('en', 'en_US'),
+    ('ru', 'ru_RU'),
+    ('en-GB', 'en_GB'),
+    ('pt-br', 'pt_BR'),
+    ('uk_UA.UTF-8', 'uk_UA'),
+    ('xx-yy', 'en_US'),
+    ('kk', 'kk'),     # no locale for it, the language alone
+    (None, 'en_US'),
+])
+async def test_get_user_locale(code, expected):
+    locale = await get_user_locale(Mock(language_code=code))
+    assert locale == expected
+    assert Localization(locale).language == resolve_language(code)
+    assert await get_user_locale(Mock(language_code=code)) is locale     # memoized
@@ -0,0 +1,48 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageReplyMarkup, SendMessage
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar, RenderCache, PackedMarkup, PackedMarkupMiddleware
+
+
+@pytest.mark.asyncio
+async def test_packed_same_as_validated():
+    for packed, plain in [
+        (await SimpleCalendar(packed=True).start_calendar(2024, 12), await SimpleCalendar().start_calendar(2024, 12)),
+        (await DialogCalendar(packed=True).start_calendar(2024), await DialogCalendar().start_calendar(2024)),
+    ]:
+        assert isinstance(packed, PackedMarkup)
+        assert packed.model_dump(exclude_none=True) == plain.model_dump(exclude_none=True)
+        assert json.loads(packed.json_bytes) == plain.model_dump(exclude_none=True)
+
+
+@pytest.mark.asyncio
+async def test_packed_cached():
+    cache = RenderCache()
+    first = await SimpleCalendar(packed=True, cache=cache).start_calendar(2024, 12)
+    second = await SimpleCalendar(packed=True, cache=cache).start_calendar(2024, 12)
+    assert cache.hits == 1
+    assert isinstance(second, PackedMarkup) and second.json_text == first.json_text
+    assert not isinstance(await SimpleCalendar(cache=cache).start_calendar(2024, 12), PackedMarkup)
+
+
+@pytest.mark.asyncio
+async def test_packed_accepted_as_reply_markup():
+    markup = await SimpleCalendar(packed=True).start_calendar(2024, 12)
+    assert SendMessage(chat_id=1, text='Pick a date', reply_markup=markup).reply_markup is markup
+
+    method = EditMessageReplyMarkup(chat_id=1, message_id=2, reply_markup=markup)
+    make_request = AsyncMock()
+    bot = Bot('42:TEST')
+    await PackedMarkupMiddleware()(make_request, bot, method)
+    sent = make_request.call_args.args[1]
+    assert isinstance(sent, EditMessageReplyMarkup)
+    fields = {
+        options['name']: value for options, _, value in AiohttpSession().build_form_data(bot, sent)._fields
+    }
+    assert fields['reply_markup'] == markup.json_text
+    assert fields['chat_id'] == '1'
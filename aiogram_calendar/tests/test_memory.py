@@ -0,0 +1,114 @@
+import gc
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from aiogram_calendar import DialogCalendar, RenderCache, SimpleCalendar
+from aiogram_calendar.clock import FixedClock
+from aiogram_calendar.schemas import DialogCalendarCallback, SimpleCalendarCallback
+
+pytestmark = pytest.mark.skipif(
+    platform.python_implementation() != 'CPython', reason='budgets are recorded for CPython allocations'
+)
+
+# bytes, recorded on CPython 3.11 with ~20% headroom, a month keyboard has about 50 buttons
+PEAK_PER_RENDER = 72_000
+PEAK_PER_SELECTION = 74_000
+RETAINED_PER_CALL = 64          # anything above is a leak, e.g. closures kept by caches
+PER_CACHED_KEYBOARD = 66_000
+PER_CACHED_PACKED_KEYBOARD = 82_000
+CALLS = 50
+
+clock = FixedClock(datetime(2024, 5, 15, 12, tzinfo=timezone.utc))
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+def fake_query():
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=1), message_id=1, reply_markup=None,
+        edit_reply_markup=_noop, delete_reply_markup=_noop
+    )
+    return SimpleNamespace(message=message, answer=_noop)
+
+
+async def measure(make_call) -> tuple:
+    """Returns peak bytes of one call and bytes retained per call after CALLS calls"""
+    for _ in range(3):      # compile templates & fill memoized helpers
+        await make_call()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = await make_call()
+        peak = tracemalloc.get_traced_memory()[1] - before
+        del result
+        for _ in range(CALLS - 1):
+            await make_call()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return peak, retained / CALLS
+
+
+@pytest.mark.asyncio
+async def test_simple_start_calendar():
+    calendar = SimpleCalendar(clock=clock)
+    peak, retained = await measure(lambda: calendar.start_calendar(2024, 5))
+    assert peak < PEAK_PER_RENDER
+    assert retained < RETAINED_PER_CALL
+
+
+@pytest.mark.asyncio
+async def test_dialog_days():
+    calendar = DialogCalendar(clock=clock)
+    peak, retained = await measure(lambda: calendar._get_days_kb(2024, 5))
+    assert peak < PEAK_PER_RENDER
+    assert retained < RETAINED_PER_CALL
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('calendar_cls, callback', [
+    (SimpleCalendar, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=5, day=1)),
+    (SimpleCalendar, SimpleCalendarCallback(act='DAY', year=2024, month=5, day=20)),
+    (DialogCalendar, DialogCalendarCallback(act='SET-MONTH', year=2024, month=5, day=-1)),
+    (DialogCalendar, DialogCalendarCallback(act='SET-YEAR', year=2024, month=-1, day=-1)),
+])
+async def test_process_selection(calendar_cls, callback):
+    calendar, query = calendar_cls(clock=clock), fake_query()
+    peak, retained = await measure(lambda: calendar.process_selection(query, callback))
+    assert peak < PEAK_PER_SELECTION
+    assert retained < RETAINED_PER_CALL
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('packed, budget', [(False, PER_CACHED_KEYBOARD), (True, PER_CACHED_PACKED_KEYBOARD)])
+async def test_per_cached_keyboard(packed, budget):
+    months = [(year, month) for year in range(2030, 2035) for month in range(1, 13)]
+    warm = SimpleCalendar(clock=clock, packed=packed)
+    for year, month in months:      # templates are shared, only keyboards are counted
+        await warm.start_calendar(year, month)
+
+    cache = RenderCache(maxsize=len(months))
+    calendar = SimpleCalendar(clock=clock, cache=cache, packed=packed)
+    await calendar.start_calendar(2000, 1)
+    cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for year, month in months:
+            await calendar.start_calendar(year, month)
+        gc.collect()
+        per_entry = (tracemalloc.get_traced_memory()[0] - before) / len(months)
+    finally:
+        tracemalloc.stop()
+    assert len(cache) == len(months)
+    assert per_entry < budget
@@ -0,0 +1,72 @@
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from aiogram_calendar import CalendarMetrics, DialogCalendar, RenderCache, SimpleCalendar
+from aiogram_calendar.metrics import Histogram
+from aiogram_calendar.schemas import DialogCalendarCallback, SimpleCalendarCallback
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 1):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.001, 2), (0.01, 3), (float('inf'), 4)]
+    assert histogram.count == 4
+
+
+@pytest.mark.asyncio
+async def test_calendar_metrics():
+    metrics = CalendarMetrics()
+    calendar = SimpleCalendar(locale='en', metrics=metrics, cache=RenderCache())
+    query = AsyncMock()
+    for _ in range(2):
+        await calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1))
+    await calendar.process_selection(
+        query, SimpleCalendarCallback(act='DAY', year=2024, month=1, day=1), min_date=datetime(2024, 1, 5)
+    )
+    await DialogCalendar(metrics=metrics).process_selection(
+        query, DialogCalendarCallback(act='SET-YEAR', year=2024, month=-1, day=-1)
+    )
+
+    assert metrics.actions == {
+        ('SimpleCalendar', 'NEXT-MONTH'): 2, ('SimpleCalendar', 'DAY'): 1, ('DialogCalendar', 'SET-YEAR'): 1
+    }
+    assert metrics.rejections == {('SimpleCalendar', 'min_date'): 1}
+    assert metrics.cache == {('SimpleCalendar', 'miss'): 1, ('SimpleCalendar', 'hit'): 1}
+    assert metrics.renders[('SimpleCalendar', 'days', 'en')].count == 1
+    assert metrics.renders[('DialogCalendar', 'months', 'en')].count == 1
+
+    text = metrics.expose()
+    assert '# TYPE aiogram_calendar_actions_total counter' in text
+    assert 'aiogram_calendar_actions_total{calendar="SimpleCalendar",action="NEXT-MONTH"} 2' in text
+    assert 'aiogram_calendar_day_rejections_total{calendar="SimpleCalendar",reason="min_date"} 1' in text
+    assert 'aiogram_calendar_cache_requests_total{calendar="SimpleCalendar",result="hit"} 1' in text
+    assert (
+        'aiogram_calendar_render_seconds_bucket{calendar="SimpleCalendar",view="days",locale="en",le="+Inf"} 1'
+    ) in text
+    assert 'aiogram_calendar_render_seconds_count{calendar="DialogCalendar",view="months",locale="en"} 1' in text
+
+
+def test_label_escaping():
+    metrics = CalendarMetrics()
+    metrics.count_action('Custom"Calendar', 'A\\B\n')
+    assert 'calendar="Custom\\"Calendar",action="A\\\\B\\n"' in metrics.expose()
+
+
+@pytest.mark.asyncio
+async def test_serve():
+    aiohttp = pytest.importorskip('aiohttp')
+    metrics = CalendarMetrics()
+    metrics.count_action('SimpleCalendar', 'DAY')
+    runner = await metrics.serve(port=0)
+    try:
+        port = runner.addresses[0][1]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                assert response.status == 200
+                assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+                assert 'SimpleCalendar' in await response.text()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import ValidationError
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar, CalendarRegistry
+from aiogram_calendar.schemas import SimpleCalendarCallback, superscript
+
+
+def test_shared_instances():
+    registry = CalendarRegistry()
+    calendar = registry.get(SimpleCalendar, locale='ru', show_alerts=True)
+    assert registry.get(SimpleCalendar, locale='ru', show_alerts=True) is calendar
+    assert registry.get(SimpleCalendar, locale='en', show_alerts=True) is not calendar
+    assert registry.get(DialogCalendar, locale='ru', show_alerts=True) is not calendar
+    assert len(registry) == 3
+    assert calendar.frozen
+    with pytest.raises(RuntimeError):
+        calendar.set_dates_range(datetime(2024, 1, 1), datetime(2024, 12, 31))
+    with pytest.raises(AttributeError):
+        calendar.show_alerts = False
+    with pytest.raises(ValidationError):
+        calendar._labels.today_caption = 'Now'
+    assert isinstance(calendar._labels.months, tuple)
+
+
+@pytest.mark.asyncio
+async def test_per_call_dates_range():
+    calendar = CalendarRegistry().get(SimpleCalendar)
+    ranged, free = await asyncio.gather(
+        calendar.start_calendar(2024, 12, min_date=datetime(2024, 12, 10)),
+        calendar.start_calendar(2024, 12),
+    )
+    assert ranged.inline_keyboard[4][0].text == superscript('2')
+    assert free.inline_keyboard[4][0].text == '2'
+
+    query = AsyncMock()
+    data = SimpleCalendarCallback(act='DAY', year=2024, month=12, day=2)
+    assert await calendar.process_selection(query, data, min_date=datetime(2024, 12, 10)) == (False, None)
+    assert await calendar.process_selection(query, data) == (True, datetime(2024, 12, 2))
@@ -0,0 +1,65 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from functools import partial
+
+import pytest
+
+from aiogram_calendar import DialogCalendar, RenderCache, SimpleCalendar
+from aiogram_calendar.clock import FixedClock
+from aiogram_calendar import dialog_calendar, simple_calendar
+from aiogram_calendar.compact import CompactCodec, dialog_codec, simple_codec
+from aiogram_calendar.schemas import CallbackPacker, SimpleCalendarCallback, dialog_packer, simple_packer
+
+TODAY = date(2024, 5, 15)
+clock = FixedClock(datetime(2024, 5, 15, 12, tzinfo=timezone.utc))
+
+
+def as_rows(markup):
+    return [[(button.text, button.callback_data) for button in row] for row in markup.inline_keyboard]
+
+
+@pytest.mark.asyncio
+async def test_pure_renderers_match_calendars():
+    simple, dialog = SimpleCalendar(clock=clock), DialogCalendar(clock=clock)
+    keyboard = simple_calendar.render_days(simple.labels_key(), 2024, 5, TODAY)
+    assert keyboard.rows == as_rows(await simple.start_calendar(2024, 5))
+    assert keyboard.row_width == 7
+
+    labels = dialog.labels_key()
+    assert dialog_calendar.render_years(labels, 2024, TODAY).rows == as_rows(await dialog.start_calendar(2024))
+    assert dialog_calendar.render_months(labels, 2024, TODAY).rows == as_rows(await dialog._get_month_kb(2024))
+    assert dialog_calendar.render_days(labels, 2024, 5, TODAY).rows == as_rows(await dialog.start_calendar(2024, 5))
+
+
+def test_render_calendar_is_sync():
+    markup = SimpleCalendar(clock=clock).render_calendar()
+    assert markup.inline_keyboard[1][1].text == '[May]'
+    assert DialogCalendar(clock=clock).render_calendar(month=5).inline_keyboard[0][2].text == '[May]'
+
+
+def test_process_pool_prerender():
+    render = partial(simple_calendar.render_days, SimpleCalendar().labels_key(), 2024, today=TODAY)
+    months = range(1, 13)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        rendered = list(pool.map(render, months))
+    assert rendered == [render(month) for month in months]
+
+
+def test_threads_share_cache():
+    cache = RenderCache(maxsize=8)
+    calendar = SimpleCalendar(cache=cache, clock=clock)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda month: calendar.render_calendar(2024, month % 12 + 1), range(200)))
+    assert len(cache) == 8
+    assert cache.hits + cache.misses == 200
+
+
+def test_packers_pickle_to_singletons():
+    for packer in (simple_packer, dialog_packer, simple_codec, dialog_codec):
+        assert pickle.loads(pickle.dumps(packer)) is packer
+    custom = CallbackPacker(SimpleCalendarCallback)
+    copy = pickle.loads(pickle.dumps(custom))
+    assert copy is not custom and copy.pack('DAY', 2024, 1, 2) == custom.pack('DAY', 2024, 1, 2)
+    codec = CompactCodec(SimpleCalendarCallback, 'xc', simple_codec._actions)
+    assert pickle.loads(pickle.dumps(codec)).pack('DAY', 2024, 1, 2) == codec.pack('DAY', 2024, 1, 2)
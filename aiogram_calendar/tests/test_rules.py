@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from aiogram_calendar import SimpleCalendar, DialogCalendar, DateRules
+from aiogram_calendar.schemas import SimpleCalendarCallback, DialogCalendarCallback, superscript
+
+
+def disabled_days(rules, year, month):
+    mask = rules.month_mask(year, month)
+    return [day for day in range(1, 32) if mask >> (day - 1) & 1]
+
+
+def test_month_mask():
+    rules = DateRules(
+        min_date=date(2024, 12, 3),
+        blackouts=[(date(2024, 11, 20), date(2024, 12, 5)), (date(2024, 12, 24), date(2025, 1, 2))],
+        weekdays=[6],
+        dates=[date(2024, 12, 10), date(2025, 12, 10)]
+    )
+    assert disabled_days(rules, 2024, 12) == [1, 2, 3, 4, 5, 8, 10, 15, 22, 24, 25, 26, 27, 28, 29, 30, 31]
+    assert disabled_days(rules, 2025, 1) == [1, 2, 5, 12, 19, 26]
+    assert disabled_days(rules, 2024, 1) == list(range(1, 32))
+    assert rules.is_disabled(date(2024, 12, 10))
+    assert not rules.is_disabled(date(2024, 12, 11))
+
+
+def test_rules_hashable():
+    assert DateRules(weekdays=[5, 6]) == DateRules(weekdays=(6, 5))
+    assert len({DateRules(weekdays=[5, 6]), DateRules(weekdays=(6, 5)), DateRules()}) == 2
+    with pytest.raises(ValueError):
+        DateRules(weekdays=[7])
+
+
+@pytest.mark.asyncio
+async def test_render_disabled_days():
+    rules = DateRules(weekdays=[5, 6])
+    markup = await SimpleCalendar(rules=rules).start_calendar(2024, 12)
+    # December 2024 starts on Sunday
+    assert markup.inline_keyboard[3][6].text == superscript('1')
+    assert markup.inline_keyboard[4][0].text == '2'
+
+    markup = await DialogCalendar(rules=rules).start_calendar(2024, 12)
+    assert markup.inline_keyboard[2][6].text == superscript('1')
+
+
+testset = [
+    (date(2024, 12, 7), (False, None)),
+    (date(2024, 12, 24), (False, None)),
+    (date(2024, 12, 9), (True, datetime(2024, 12, 9))),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("selected, expected", testset)
+async def test_process_day_select(selected, expected):
+    rules = DateRules(weekdays=[5, 6], dates=[date(2024, 12, 24)])
+    fields = dict(year=selected.year, month=selected.month, day=selected.day)
+    for calendar, callback in [
+        (SimpleCalendar(rules=rules), SimpleCalendarCallback(act='DAY', **fields)),
+        (DialogCalendar(rules=rules), DialogCalendarCallback(act='SET-DAY', **fields)),
+    ]:
+        query = AsyncMock()
+        assert await calendar.process_selection(query, callback) == expected
+        if not expected[0]:
+            assert 'not available' in query.answer.call_args.args[0]
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from aiogram_calendar import SimpleCalendar
+from aiogram_calendar.scheduler import ApiScheduler, TokenBucket, FINAL, NAVIGATION
+from aiogram_calendar.schemas import SimpleCalendarCallback
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2, now=0)
+    bucket.take(0)
+    bucket.take(0)
+    assert bucket.ready_at(0) == 0.5
+    assert bucket.ready_at(1) == 1
+    bucket.pause(5)
+    assert bucket.ready_at(1) == 5
+    assert not bucket.is_idle(4)
+    assert bucket.is_idle(6)
+
+
+@pytest.mark.asyncio
+async def test_final_calls_go_first():
+    scheduler = ApiScheduler(global_rate=100, global_burst=1)
+    order = []
+
+    def make_call(name):
+        async def call():
+            order.append(name)
+        return call
+
+    await asyncio.gather(
+        scheduler.call(1, make_call('nav 1'), NAVIGATION),
+        scheduler.call(2, make_call('nav 2'), NAVIGATION),
+        scheduler.call(3, make_call('nav 3'), NAVIGATION),
+        scheduler.call(4, make_call('final'), FINAL),
+    )
+    assert order == ['final', 'nav 1', 'nav 2', 'nav 3']
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_rate():
+    scheduler = ApiScheduler(chat_rate=50, chat_burst=1)
+    started = time.monotonic()
+    await asyncio.gather(*(scheduler.call(1, AsyncMock()) for _ in range(3)))
+    assert time.monotonic() - started >= 0.035
+
+
+@pytest.mark.asyncio
+async def test_retry_after():
+    scheduler = ApiScheduler(max_retries=2)
+    call = AsyncMock(side_effect=[TelegramRetryAfter(Mock(), 'flood', 0), 'ok'])
+    assert await scheduler.call(1, call) == 'ok'
+    assert call.await_count == 2 and scheduler.retries == 1
+
+    failing = AsyncMock(side_effect=TelegramRetryAfter(Mock(), 'flood', 0))
+    with pytest.raises(TelegramRetryAfter):
+        await scheduler.call(1, failing)
+    assert failing.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_calendar_routes_calls():
+    scheduler = ApiScheduler()
+    scheduler.call = AsyncMock(wraps=scheduler.call)
+    query = AsyncMock()
+    query.message.chat.id = 42
+    calendar = SimpleCalendar(scheduler=scheduler)
+    await calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1))
+    selected, _ = await calendar.process_selection(
+        query, SimpleCalendarCallback(act='DAY', year=2024, month=1, day=5)
+    )
+    assert selected
+    assert [call.args[0] for call in scheduler.call.await_args_list] == [42, 42]
+    assert [call.args[2] for call in scheduler.call.await_args_list] == [NAVIGATION, FINAL]
+
+
+def test_reused_under_new_event_loop():
+    scheduler = ApiScheduler(chat_rate=100, chat_burst=1)
+
+    async def calls():
+        # the second call waits for a token, binding the wakeup event to the running loop
+        return await asyncio.wait_for(asyncio.gather(
+            scheduler.call(1, AsyncMock(return_value='first')), scheduler.call(1, AsyncMock(return_value='second'))
+        ), timeout=1)
+
+    assert asyncio.run(calls()) == ['first', 'second']
+    assert asyncio.run(calls()) == ['first', 'second']
+
+
+@pytest.mark.asyncio
+async def test_new_chat_is_not_forgotten_when_others_are_busy():
+    scheduler = ApiScheduler(max_chats=1)
+    assert await scheduler.call('A', AsyncMock(return_value='a')) == 'a'
+    # bucket of A is not full yet, B's is the only idle one
+    assert await asyncio.wait_for(scheduler.call('B', AsyncMock(return_value='b')), timeout=1) == 'b'
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_other_chats():
+    scheduler = ApiScheduler()
+    flooded = asyncio.Event()
+
+    async def call():
+        if not flooded.is_set():
+            flooded.set()
+            raise TelegramRetryAfter(Mock(), 'flood', 0.05)
+
+    started = time.monotonic()
+    retried = asyncio.ensure_future(scheduler.call(1, call))
+    await flooded.wait()
+    await asyncio.sleep(0.01)
+    await scheduler.call(2, AsyncMock())
+    assert time.monotonic() - started >= 0.05
+    await retried
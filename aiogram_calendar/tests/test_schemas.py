@@ -0,0 +1,26 @@
+import pytest
+
+from aiogram_calendar.schemas import (
+    SimpleCalendarCallback, DialogCalendarCallback, SimpleCalAct, DialogCalAct, simple_packer, dialog_packer
+)
+
+values = [(None, None, None), (2024, 12, 12), (2022, -1, -1), (1900, 1, 0), ('2021', '7', '16')]
+
+
+@pytest.mark.parametrize("packer, callback_cls, acts", [
+    (simple_packer, SimpleCalendarCallback, SimpleCalAct),
+    (dialog_packer, DialogCalendarCallback, DialogCalAct),
+])
+def test_packer_round_trip(packer, callback_cls, acts):
+    for act in acts:
+        for year, month, day in values:
+            expected = callback_cls(act=act, year=year, month=month, day=day)
+            packed = packer.pack(act, year, month, day)
+            assert packed == expected.pack()
+            assert packer.pack(act.value, year, month, day) == packed
+            assert callback_cls.unpack(packed) == expected
+
+
+def test_packer_unknown_act():
+    with pytest.raises(ValueError):
+        simple_packer.pack(DialogCalAct.set_y, 2024)
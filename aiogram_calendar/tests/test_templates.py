@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from aiogram_calendar.schemas import superscript
+from aiogram_calendar.simple_calendar import _compile_days_template
+from aiogram_calendar.rules import day_bounds, range_mask
+from aiogram_calendar.templates import apply_overlay
+
+LABELS = (('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su'), tuple(str(m) for m in range(1, 13)), 'Cancel', 'Today')
+
+
+def test_template_shared():
+    assert _compile_days_template(LABELS, 2024, 12) is _compile_days_template(LABELS, 2024, 12)
+
+
+def test_overlay_today():
+    template = _compile_days_template(LABELS, 2024, 12)
+    rows = apply_overlay(template, date(2024, 12, 12))
+    assert rows[0][1][0] == '[2024]'
+    assert rows[1][1][0] == '[12]'
+    assert rows[2][3][0] == '[Th]'
+    row, col = template.day_cells[11]
+    assert rows[row][col][0] == '[12]'
+    # template itself stays untouched
+    assert template.rows[row][col][0] == '12'
+
+
+def test_overlay_other_month():
+    template = _compile_days_template(LABELS, 2024, 11)
+    rows = apply_overlay(template, date(2024, 12, 12))
+    assert rows[0][1][0] == '[2024]'
+    assert rows[1][1][0] == '11'
+    assert [text for text, _ in rows[2]] == list(LABELS[0])
+
+
+def test_overlay_dates_range():
+    template = _compile_days_template(LABELS, 2024, 12)
+    mask = range_mask(2024, 12, 31, datetime(2024, 12, 3, 10), datetime(2024, 12, 30))
+    rows = apply_overlay(template, date(2023, 1, 1), mask)
+    texts = [rows[row][col][0] for row, col in template.day_cells]
+    assert texts[:3] == [superscript('1'), superscript('2'), superscript('3')]
+    assert texts[3:29] == [str(day) for day in range(4, 30)]
+    assert texts[29:] == ['30', superscript('31')]
+
+
+def test_day_bounds():
+    assert day_bounds(2024, 2, 29) == (1, 29)
+    assert day_bounds(2024, 2, 29, datetime(2024, 2, 10), datetime(2024, 2, 20)) == (10, 20)
+    assert day_bounds(2024, 2, 29, datetime(2024, 3, 1), None)[0] > 29
+    assert day_bounds(2024, 2, 29, None, datetime(2024, 1, 31))[1] < 1
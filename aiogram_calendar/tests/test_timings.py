@@ -0,0 +1,77 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from aiogram_calendar import DialogCalendar, SimpleCalendar
+from aiogram_calendar.schemas import DialogCalendarCallback, SimpleCalendarCallback
+from aiogram_calendar.timings import CallbackTimings
+
+
+@pytest.mark.asyncio
+async def test_ack_before_edit_completes():
+    events = []
+    query = AsyncMock()
+
+    async def answer(*args, **kwargs):
+        events.append('answer')
+
+    async def edit(reply_markup):
+        events.append('edit started')
+        await asyncio.sleep(0.01)
+        events.append('edit done')
+    query.answer.side_effect = answer
+    query.message.edit_reply_markup.side_effect = edit
+
+    timings = CallbackTimings()
+    calendar = SimpleCalendar(ack_first=True, timings=timings)
+    await calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1))
+    assert events.index('answer') < events.index('edit started')
+    query.answer.assert_awaited_once()
+
+    [timing] = timings
+    assert timing.action == 'NEXT-MONTH'
+    assert timing.ack_ms <= timing.edit_ms <= timing.total_ms
+    assert timings.summary()['count'] == 1
+
+
+@pytest.mark.asyncio
+async def test_too_old_query_still_navigates():
+    query = AsyncMock()
+    query.answer.side_effect = TelegramBadRequest(
+        method=None, message='Bad Request: query is too old and response timeout expired or query ID is invalid'
+    )
+    timings = CallbackTimings()
+    calendar = SimpleCalendar(ack_first=True, timings=timings)
+    await calendar.process_selection(query, SimpleCalendarCallback(act='NEXT-MONTH', year=2024, month=1, day=1))
+    query.message.edit_reply_markup.assert_awaited_once()
+    [timing] = timings
+    assert not timing.acked
+    assert timings.summary()['ack_failed'] == 1
+
+
+@pytest.mark.asyncio
+async def test_navigation_answered_once():
+    query = AsyncMock()
+    calendar = DialogCalendar(ack_first=True)
+    for act in ('SET-YEAR', 'PREV-YEAR', 'NEXT-YEAR', 'START'):
+        await calendar.process_selection(query, DialogCalendarCallback(act=act, year=2024, month=-1, day=-1))
+    await calendar.process_selection(query, DialogCalendarCallback(act='SET-MONTH', year=2024, month=5, day=-1))
+    assert query.answer.await_count == query.message.edit_reply_markup.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_default_mode_does_not_answer():
+    query = AsyncMock()
+    await SimpleCalendar().process_selection(query, SimpleCalendarCallback(act='PREV-YEAR', year=2024, month=1, day=1))
+    query.answer.assert_not_awaited()
+
+
+def test_summary_percentiles():
+    timings = CallbackTimings(maxsize=100)
+    for value in range(1, 201):
+        timings.record('x', value, value, value)
+    summary = timings.summary()
+    assert len(timings) == 100
+    assert (summary['ack_p50'], summary['ack_p95'], summary['ack_max']) == (151, 196, 200)
@@ -0,0 +1,51 @@
+from collections import deque
+from typing import NamedTuple
+
+
+class CallbackTiming(NamedTuple):
+    action: str
+    ack_ms: float       # query.answer() round trip
+    edit_ms: float      # rendering & edit_reply_markup
+    total_ms: float     # from the start of handling until both are done
+    acked: bool = True  # False if query.answer() failed, the query was too old
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of sorted values, 0 for no values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class CallbackTimings:
+    """Ring buffer of timings of calendar callbacks handled in ack-first mode
+
+    Usage:
+        timings = CallbackTimings()
+        calendar = SimpleCalendar(ack_first=True, timings=timings)
+        ...
+        logger.info('calendar timings %s', timings.summary())
+    """
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self._records = deque(maxlen=maxsize)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(list(self._records))
+
+    def record(self, action: str, ack_ms: float, edit_ms: float, total_ms: float, acked: bool = True) -> None:
+        self._records.append(CallbackTiming(action, ack_ms, edit_ms, total_ms, acked))
+
+    def summary(self) -> dict:
+        """Count, failed acks and p50 / p95 / max milliseconds of each phase over recorded callbacks"""
+        result = {'count': len(self._records), 'ack_failed': sum(not record.acked for record in self._records)}
+        for phase in ('ack_ms', 'edit_ms', 'total_ms'):
+            values = sorted(getattr(record, phase) for record in self._records)
+            name = phase[:-3]
+            result[f'{name}_p50'] = percentile(values, 0.5)
+            result[f'{name}_p95'] = percentile(values, 0.95)
+            result[f'{name}_max'] = values[-1] if values else 0.0
+        return result
@@ -0,0 +1,347 @@
+"""Latency report of updates handled by a bot, from aiogram log lines
+
+Reads "Update id=N is handled. Duration X ms" lines of aiogram.event in constant memory:
+latencies are counted in log-scale buckets, only the slowest updates and the current time window
+are kept, each window is printed once the next one starts. Rotated and gzipped files are read
+in order of their first timestamps:
+
+    python benchmarks/analyze_log.py bot.log bot.log.1 bot.log.2.gz --window 3600
+    python benchmarks/analyze_log.py bot.log --json > latency.jsonl
+
+JSON output has a line per window and the summary report as the last line.
+
+Percentiles are accurate to about 1%. Besides latency the report has handled / not handled
+updates, polling starts, stops & fetch errors and time the bot was not polling.
+"""
+import argparse
+import gzip
+import heapq
+import itertools
+import json
+import math
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+UPDATE = re.compile(r'Update id=(\d+) is (handled|not handled)\. Duration (\d+) ms')
+START = 'aiogram.dispatcher - INFO - Start polling'
+STOP = 'aiogram.dispatcher - INFO - Polling stopped'   # also matches "Polling stopped for bot ..."
+FETCH_ERROR = 'Failed to fetch updates'
+SIGNAL = 'Received SIG'
+
+BUCKET_GROWTH = 1.02        # bucket N holds durations up to 1.02 ** N ms
+
+
+class Update(NamedTuple):
+    time: datetime
+    update_id: int
+    handled: bool
+    duration_ms: int
+
+
+class Histogram:
+    """Counts of durations in log-scale buckets, percentile error is half of bucket growth"""
+
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    def __init__(self) -> None:
+        self.buckets = Counter()
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def add(self, value: float) -> None:
+        self.buckets[math.ceil(math.log(value, BUCKET_GROWTH)) if value > 1 else 0] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Nearest-rank percentile, the middle of its bucket"""
+        if not self.count:
+            return 0.0
+        rank = min(self.count, max(1, math.ceil(fraction * self.count)))
+        if rank == self.count:
+            return float(self.max)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                if bucket == 0:
+                    return float(min(self.max, 1))
+                return float(min(self.max, (BUCKET_GROWTH ** (bucket - 1) + BUCKET_GROWTH ** bucket) / 2))
+        return float(self.max)
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.sum / self.count, 1) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5), 1),
+            'p90_ms': round(self.percentile(0.9), 1),
+            'p99_ms': round(self.percentile(0.99), 1),
+            'max_ms': self.max,
+        }
+
+
+class Window:
+    __slots__ = ('latency', 'handled', 'not_handled')
+
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.handled = 0
+        self.not_handled = 0
+
+    def add(self, update: Update) -> None:
+        self.latency.add(update.duration_ms)
+        if update.handled:
+            self.handled += 1
+        else:
+            self.not_handled += 1
+
+    def summary(self) -> dict:
+        return dict(self.latency.summary(), handled=self.handled, not_handled=self.not_handled)
+
+
+def parse_time(line: str) -> Optional[datetime]:
+    """Time of line starting with logging's asctime, 2024-12-03 03:48:46,945"""
+    try:
+        return datetime.fromisoformat(line[:23].replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def open_log(path: str) -> TextIO:
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def first_time(path: str) -> datetime:
+    with open_log(path) as file:
+        for line in itertools.islice(file, 1000):
+            time = parse_time(line)
+            if time is not None:
+                return time
+    return datetime.max
+
+
+def log_lines(paths: Iterable[str]) -> Iterator[str]:
+    """Lines of files oldest first, rotated files are ordered by their first timestamp"""
+    paths = list(paths)
+    if '-' not in paths:
+        paths.sort(key=first_time)
+    for path in paths:
+        file = open_log(path)
+        try:
+            yield from file
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+
+class LogAnalyzer:
+    """Accumulates report of log lines fed one by one, call finish() after the last line
+
+    Lines are expected in time order, an update older than the current window is counted in it.
+    """
+
+    def __init__(
+        self, window: float = 300, slow_ms: float = 1000, top: int = 10, on_window: Callable[[dict], None] = None
+    ) -> None:
+        """
+        Parameters:
+        window (float): seconds of time windows latency is reported for
+        slow_ms (float): updates taking longer are counted as slow
+        top (int): slowest updates kept for the report
+        on_window (callable): called with summary of each window once it is over
+        """
+        self.window = timedelta(seconds=window)
+        self.slow_ms = slow_ms
+        self.top = top
+        self.on_window = on_window
+        self.total = Window()
+        self._window = None             # current Window
+        self._window_start = None
+        self.slow = 0
+        self._slowest = []      # heap of (duration, sequence, Update)
+        self._sequence = itertools.count()
+        self.polling = Counter()
+        self.downtime = timedelta()
+        self._stopped_at = None
+        self.first = self.last = None
+
+    def feed(self, line: str) -> None:
+        if 'Update id=' in line:
+            match = UPDATE.search(line)
+            time = parse_time(line)
+            if match is None or time is None:
+                return
+            self._add(Update(time, int(match.group(1)), match.group(2) == 'handled', int(match.group(3))))
+        elif START in line:
+            self._polling('starts', line)
+        elif STOP in line:
+            if line.rstrip().endswith('Polling stopped'):   # once per dispatcher, not per bot
+                self._polling('stops', line)
+        elif FETCH_ERROR in line:
+            self._polling('fetch_errors', line)
+        elif SIGNAL in line:
+            self._polling('signals', line)
+
+    def _add(self, update: Update) -> None:
+        self.first = self.first or update.time
+        self.last = update.time
+        self.total.add(update)
+        start = datetime.min + (update.time - datetime.min) // self.window * self.window
+        if self._window is None or start > self._window_start:
+            self._flush()
+            self._window, self._window_start = Window(), start
+        self._window.add(update)
+        if update.duration_ms > self.slow_ms:
+            self.slow += 1
+        item = (update.duration_ms, next(self._sequence), update)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, item)
+        elif self.top:
+            heapq.heappushpop(self._slowest, item)
+
+    def _flush(self) -> None:
+        if self._window is not None and self.on_window is not None:
+            start = self._window_start.isoformat(sep=' ', timespec='seconds')
+            self.on_window(dict(start=start, **self._window.summary()))
+        self._window = self._window_start = None
+
+    def finish(self) -> dict:
+        """Reports the last window, returns report"""
+        self._flush()
+        return self.report()
+
+    def _polling(self, event: str, line: str) -> None:
+        self.polling[event] += 1
+        time = parse_time(line)
+        if time is None:
+            return
+        if event == 'stops':
+            self._stopped_at = time
+        elif event == 'starts' and self._stopped_at is not None:
+            self.downtime += time - self._stopped_at
+            self._stopped_at = None
+
+    def report(self) -> dict:
+        total = self.total.handled + self.total.not_handled
+        return {
+            'first': self.first.isoformat(sep=' ', timespec='milliseconds') if self.first else None,
+            'last': self.last.isoformat(sep=' ', timespec='milliseconds') if self.last else None,
+            'latency': self.total.latency.summary(),
+            'handled': self.total.handled,
+            'not_handled': self.total.not_handled,
+            'handled_ratio': round(self.total.handled / total, 4) if total else None,
+            'slow_ms': self.slow_ms,
+            'slow': self.slow,
+            'slowest': [
+                {
+                    'time': update.time.isoformat(sep=' ', timespec='milliseconds'), 'update_id': update.update_id,
+                    'handled': update.handled, 'duration_ms': update.duration_ms,
+                }
+                for _, _, update in sorted(self._slowest, reverse=True)
+            ],
+            'polling': {
+                'starts': self.polling['starts'],
+                'restarts': max(0, self.polling['starts'] - 1),
+                'stops': self.polling['stops'],
+                'signals': self.polling['signals'],
+                'fetch_errors': self.polling['fetch_errors'],
+                'downtime_s': round(self.downtime.total_seconds(), 3),
+            },
+            'window_s': self.window.total_seconds(),
+        }
+
+
+def analyze(
+    paths: Iterable[str], window: float = 300, slow_ms: float = 1000, top: int = 10,
+    on_window: Callable[[dict], None] = None
+) -> dict:
+    """Report of log files, windows are passed to on_window or, without it, listed in the report"""
+    windows = None
+    if on_window is None:
+        windows = []
+        on_window = windows.append
+    analyzer = LogAnalyzer(window, slow_ms, top, on_window)
+    for line in log_lines(paths):
+        analyzer.feed(line)
+    report = analyzer.finish()
+    if windows is not None:
+        report['windows'] = windows
+    return report
+
+
+WINDOW_HEADER = f"{'window':<20} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'not handled':>12}"
+
+
+def format_window(window: dict) -> str:
+    return (
+        f"{window['start']:<20} {window['count']:>7} {window['p50_ms']:>8} {window['p90_ms']:>8} "
+        f"{window['p99_ms']:>8} {window['max_ms']:>8} {window['not_handled']:>12}"
+    )
+
+
+def format_text(report: dict) -> str:
+    """Summary of report, windows are printed separately as they are over"""
+    latency, polling = report['latency'], report['polling']
+    lines = [
+        f"{report['first']} .. {report['last']}",
+        f"updates {latency['count']}, handled {report['handled']}, not handled {report['not_handled']}"
+        + (f" ({report['handled_ratio']:.1%} handled)" if report['handled_ratio'] is not None else ''),
+        f"latency ms p50 {latency['p50_ms']}, p90 {latency['p90_ms']}, p99 {latency['p99_ms']}, "
+        f"max {latency['max_ms']}, mean {latency['mean_ms']}",
+        f"slower than {report['slow_ms']} ms: {report['slow']}",
+        f"polling starts {polling['starts']} (restarts {polling['restarts']}), stops {polling['stops']}, "
+        f"signals {polling['signals']}, fetch errors {polling['fetch_errors']}, not polling {polling['downtime_s']} s",
+    ]
+    if report['slowest']:
+        lines += ['', 'slowest updates:']
+        lines += [
+            f"{update['time']}  id={update['update_id']}  {update['duration_ms']} ms"
+            + ('' if update['handled'] else '  not handled')
+            for update in report['slowest']
+        ]
+    return '\n'.join(lines)
+
+
+def main(args: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help="log files, rotated and .gz ones too, '-' is stdin")
+    parser.add_argument('-w', '--window', type=float, default=300, help='seconds per time window')
+    parser.add_argument('-s', '--slow-ms', type=float, default=1000, help='updates slower than that are outliers')
+    parser.add_argument('-n', '--top', type=int, default=10, help='slowest updates to list')
+    parser.add_argument('--json', action='store_true', help='print JSON lines of windows & report for dashboards')
+    parser.add_argument('-o', '--output', help='write report to file instead of stdout')
+    options = parser.parse_args(args)
+
+    output = open(options.output, 'w', encoding='utf-8') if options.output else sys.stdout
+    try:
+        if options.json:
+            def on_window(window: dict) -> None:
+                output.write(json.dumps(dict(window, type='window'), ensure_ascii=False) + '\n')
+        else:
+            output.write(WINDOW_HEADER + '\n')
+
+            def on_window(window: dict) -> None:
+                output.write(format_window(window) + '\n')
+
+        report = analyze(options.paths, options.window, options.slow_ms, options.top, on_window)
+        if options.json:
+            output.write(json.dumps(dict(report, type='report'), ensure_ascii=False) + '\n')
+        else:
+            output.write('\n' + format_text(report) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
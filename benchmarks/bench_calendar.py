@@ -0,0 +1,201 @@
+"""Benchmarks of calendar rendering, callback packing and selection processing
+
+Runs offline, callback queries are replaced with minimal fakes answering instantly.
+Results are printed as JSON, compared with a baseline when given:
+
+    python benchmarks/bench_calendar.py --output current.json
+    python benchmarks/bench_calendar.py --baseline baseline.json --threshold 0.25
+
+Exit code is 1 when a case got slower than its baseline median by more than threshold.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram_calendar import DialogCalendar, SimpleCalendar  # noqa: E402
+from aiogram_calendar.schemas import (  # noqa: E402
+    DialogCalAct, DialogCalendarCallback, SimpleCalAct, SimpleCalendarCallback
+)
+
+LOCALES = ('en', 'ru', 'de')
+RANGES = {
+    'no-range': (None, None),
+    'range': (datetime(2024, 5, 10), datetime(2024, 8, 20)),
+}
+YEAR, MONTH, DAY = 2024, 5, 15
+
+SIMPLE_ACTIONS = {
+    SimpleCalAct.ignore: (YEAR, MONTH, DAY),
+    SimpleCalAct.prev_y: (YEAR, MONTH, 1),
+    SimpleCalAct.next_y: (YEAR, MONTH, 1),
+    SimpleCalAct.prev_m: (YEAR, MONTH, 1),
+    SimpleCalAct.next_m: (YEAR, MONTH, 1),
+    SimpleCalAct.today: (YEAR - 1, MONTH, 1),
+    SimpleCalAct.cancel: (YEAR, MONTH, 1),
+    SimpleCalAct.day: (YEAR, MONTH, DAY),
+}
+DIALOG_ACTIONS = {
+    DialogCalAct.ignore: (YEAR, MONTH, DAY),
+    DialogCalAct.set_y: (YEAR, -1, -1),
+    DialogCalAct.set_m: (YEAR, MONTH, -1),
+    DialogCalAct.prev_y: (YEAR, -1, -1),
+    DialogCalAct.next_y: (YEAR, 1, 1),
+    DialogCalAct.start: (YEAR, -1, -1),
+    DialogCalAct.cancel: (YEAR, 1, 1),
+    DialogCalAct.day: (YEAR, MONTH, DAY),
+}
+
+
+async def _noop(*args, **kwargs):
+    return True
+
+
+def fake_query():
+    """Callback query doing nothing, unlike AsyncMock it keeps no call history between iterations"""
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=1), message_id=1, reply_markup=None,
+        edit_reply_markup=_noop, delete_reply_markup=_noop
+    )
+    return SimpleNamespace(message=message, answer=_noop)
+
+
+def measure(func, number: int, repeat: int) -> dict:
+    """Runs func number times per round, returns per call microseconds of rounds"""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number * 1e6)
+    return {'median_us': statistics.median(rounds), 'min_us': min(rounds), 'number': number, 'repeat': repeat}
+
+
+def measure_async(make_coroutine, number: int, repeat: int, loop: asyncio.AbstractEventLoop) -> dict:
+    async def rounds():
+        result = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                await make_coroutine()
+            result.append((time.perf_counter() - started) / number * 1e6)
+        return result
+
+    values = loop.run_until_complete(rounds())
+    return {'median_us': statistics.median(values), 'min_us': min(values), 'number': number, 'repeat': repeat}
+
+
+def cases():
+    """Yields (name, kind, callable), kind is 'sync' or 'async'"""
+    for locale in LOCALES:
+        simple, dialog = SimpleCalendar(locale=locale), DialogCalendar(locale=locale)
+        yield f'simple.start_calendar[{locale}]', 'async', lambda c=simple: c.start_calendar(YEAR, MONTH)
+        yield f'dialog.start_calendar[{locale}]', 'async', lambda c=dialog: c.start_calendar(YEAR)
+        yield f'dialog._get_days_kb[{locale}]', 'async', lambda c=dialog: c._get_days_kb(YEAR, MONTH)
+        yield f'dialog._get_month_kb[{locale}]', 'async', lambda c=dialog: c._get_month_kb(YEAR)
+
+    for callback_cls, act in ((SimpleCalendarCallback, SimpleCalAct.day), (DialogCalendarCallback, DialogCalAct.day)):
+        name = callback_cls.__name__
+        callback = callback_cls(act=act, year=YEAR, month=MONTH, day=DAY)
+        packed = callback.pack()
+        yield f'{name}.pack', 'sync', callback.pack
+        yield f'{name}.unpack', 'sync', lambda cls=callback_cls, value=packed: cls.unpack(value)
+
+    for calendar_cls, callback_cls, actions in (
+        (SimpleCalendar, SimpleCalendarCallback, SIMPLE_ACTIONS),
+        (DialogCalendar, DialogCalendarCallback, DIALOG_ACTIONS),
+    ):
+        prefix = calendar_cls.__name__.replace('Calendar', '').lower()
+        for locale in LOCALES:
+            calendar = calendar_cls(locale=locale)
+            for range_name, (min_date, max_date) in RANGES.items():
+                for act, (year, month, day) in actions.items():
+                    data = callback_cls(act=act, year=year, month=month, day=day)
+                    query = fake_query()
+                    yield (
+                        f'{prefix}.process_selection[{act.value},{locale},{range_name}]', 'async',
+                        lambda c=calendar, q=query, d=data, lo=min_date, hi=max_date: c.process_selection(
+                            q, d, min_date=lo, max_date=hi
+                        )
+                    )
+
+
+def run(number: int, repeat: int, pattern: str = None) -> dict:
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for name, kind, func in cases():
+            if pattern and pattern not in name:
+                continue
+            if kind == 'sync':
+                results[name] = measure(func, number, repeat)
+            else:
+                results[name] = measure_async(func, number, repeat, loop)
+    finally:
+        loop.close()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'cases': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Returns [(name, baseline_us, current_us, ratio)] of cases slower than baseline by more than threshold"""
+    regressions = []
+    for name, result in current['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if not base or not base['median_us']:
+            continue
+        ratio = result['median_us'] / base['median_us']
+        result['baseline_median_us'] = base['median_us']
+        result['ratio'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((name, base['median_us'], result['median_us'], ratio))
+    return regressions
+
+
+def main(args: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=200, help='calls per round')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='rounds per case, median is reported')
+    parser.add_argument('-k', '--filter', help='run only cases with this substring in name')
+    parser.add_argument('-o', '--output', help='write JSON results to file instead of stdout')
+    parser.add_argument('-b', '--baseline', help='JSON results to compare with')
+    parser.add_argument('-t', '--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 is 25%%')
+    options = parser.parse_args(args)
+
+    current = run(options.number, options.repeat, options.filter)
+    regressions = []
+    if options.baseline:
+        baseline = json.loads(Path(options.baseline).read_text())
+        regressions = compare(current, baseline, options.threshold)
+        current['meta']['baseline'] = options.baseline
+        current['meta']['threshold'] = options.threshold
+        current['regressions'] = [name for name, *_ in regressions]
+
+    output = json.dumps(current, indent=2)
+    if options.output:
+        Path(options.output).write_text(output + '\n')
+    else:
+        print(output)
+
+    for name, base, value, ratio in regressions:
+        print(f'REGRESSION {name}: {base:.1f} us -> {value:.1f} us ({ratio:.2f}x)', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Local stand-in for Telegram Bot API, bots are load tested against it without network
+
+Implements getMe, getUpdates, sendMessage, editMessageReplyMarkup and answerCallbackQuery.
+Every call except getUpdates waits for the configured latency, a share of them fails with 429:
+
+    python benchmarks/fake_bot_api.py --port 8081 --latency 0.05 --rate-limit 0.01
+
+Bots reach it with a session pointed to the server:
+
+    bot = Bot(token, session=AiohttpSession(api=TelegramAPIServer.from_base('http://127.0.0.1:8081')))
+
+Updates are queued with push_update() by a load generator running in the same process, see load_bot.py,
+or posted as JSON (one update or a list) to /updates of the server.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+NOT_LIMITED = {'getme', 'getupdates'}
+
+
+class FakeBotAPI:
+    """Bot API server answering from memory"""
+
+    def __init__(
+        self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float = 0.0, retry_after: int = 1,
+        seed: int = None
+    ) -> None:
+        """
+        Parameters:
+        latency (float): seconds each call takes
+        jitter (float): up to that many seconds are added to latency at random
+        rate_limit (float): share of calls failing with 429 Too Many Requests, 0..1
+        retry_after (int): retry_after seconds of 429 responses
+        seed (int): seed of latency jitter & 429 injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._updates = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = None
+        self._runner = None
+        self.calls = Counter()      # method -> calls
+        self.limited = Counter()    # method -> calls failed with 429
+        self.url = None
+        self._methods = {       # lowercase name -> handler, Bot API method names are case-insensitive
+            'getme': self._get_me,
+            'getupdates': self._get_updates,
+            'sendmessage': self._send_message,
+            'editmessagereplymarkup': self._edit_message_reply_markup,
+            'answercallbackquery': self._answer_callback_query,
+        }
+
+    def push_update(self, update: dict) -> int:
+        """Queues update for getUpdates, returns its update_id"""
+        update_id = next(self._update_ids)
+        self._updates.append(dict(update, update_id=update_id))
+        if self._new_updates is not None:
+            self._new_updates.set()
+        return update_id
+
+    def stats(self) -> dict:
+        return {'calls': dict(self.calls), 'limited': dict(self.limited), 'queued_updates': len(self._updates)}
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/updates', self._post_updates)
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Starts server, returns its base URL, port 0 picks a free one"""
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f'http://{host}:{port}'
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _post_updates(self, request: web.Request) -> web.Response:
+        updates = await request.json()
+        if isinstance(updates, dict):
+            updates = [updates]
+        return web.json_response({'update_ids': [self.push_update(update) for update in updates]})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        self.calls[method] += 1
+
+        handler = self._methods.get(method.lower())
+        if handler is None:
+            return self._error(404, 'Not Found: method not found')
+        if method.lower() not in NOT_LIMITED:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.rate_limit and self._random.random() < self.rate_limit:
+                self.limited[method] += 1
+                return self._error(
+                    429, f'Too Many Requests: retry after {self.retry_after}', {'retry_after': self.retry_after}
+                )
+        return web.json_response({'ok': True, 'result': await handler(request.match_info['token'], params)})
+
+    @staticmethod
+    def _error(code: int, description: str, parameters: dict = None) -> web.Response:
+        body = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            body['parameters'] = parameters
+        return web.json_response(body, status=code)
+
+    @staticmethod
+    def _bot_user(token: str) -> dict:
+        bot_id = token.split(':', 1)[0]
+        return {
+            'id': int(bot_id) if bot_id.isdigit() else 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'
+        }
+
+    def _message(self, token: str, params: dict, message_id: int = None) -> dict:
+        chat_id = int(params['chat_id'])
+        message = {
+            'message_id': message_id or next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': self._bot_user(token),
+            'text': params.get('text', ''),
+        }
+        if params.get('reply_markup'):
+            markup = json.loads(params['reply_markup'])
+            if 'inline_keyboard' in markup:
+                message['reply_markup'] = markup
+        return message
+
+    async def _get_me(self, token: str, params: dict) -> dict:
+        return self._bot_user(token)
+
+    async def _get_updates(self, token: str, params: dict) -> list:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates and timeout:
+            if self._new_updates is None:
+                self._new_updates = asyncio.Event()
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _send_message(self, token: str, params: dict) -> dict:
+        return self._message(token, params)
+
+    async def _edit_message_reply_markup(self, token: str, params: dict) -> dict:
+        return self._message(token, params, int(params['message_id']))
+
+    async def _answer_callback_query(self, token: str, params: dict) -> bool:
+        return True
+
+
+def main(args: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds each call takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random seconds added to latency')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='share of calls failing with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after of 429 responses')
+    parser.add_argument('--seed', type=int)
+    options = parser.parse_args(args)
+
+    api = FakeBotAPI(options.latency, options.jitter, options.rate_limit, options.retry_after, options.seed)
+    web.run_app(api.application(), host=options.host, port=options.port)
+
+
+if __name__ == '__main__':
+    main()
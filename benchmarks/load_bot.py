@@ -0,0 +1,260 @@
+"""Load test of a bot dispatcher through the fake Bot API, reports throughput and handling latency
+
+Users open calendars, navigate them and pick dates, or tap quick dates. Their updates are sent
+at a target rate, the next update of a user is sent once the previous one is handled:
+
+    python benchmarks/load_bot.py --rate 50 --duration 30 --latency 0.05 --rate-limit 0.01
+
+Latency is measured from queueing an update in the fake server to the end of its handling,
+it includes getUpdates delivery and Bot API calls made by handlers. The dispatcher & bot are
+taken from example_bot.py by default, its API server is replaced by the fake one.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from datetime import date
+from importlib import import_module
+from pathlib import Path
+
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.dispatcher.event.bases import UNHANDLED
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from aiogram_calendar.schemas import (  # noqa: E402
+    DialogCalAct, DialogCalendarCallback, SimpleCalAct, SimpleCalendarCallback
+)
+from aiogram_calendar.timings import percentile  # noqa: E402
+from fake_bot_api import FakeBotAPI  # noqa: E402
+
+
+def simple_navigation(today: date) -> list:
+    year, month = today.year, today.month
+    next_year, next_month = (year, month + 1) if month < 12 else (year + 1, 1)
+    return [
+        ('message', '📅 Простой календарь'),
+        ('callback', SimpleCalendarCallback(act=SimpleCalAct.next_m, year=year, month=month, day=1).pack()),
+        ('callback', SimpleCalendarCallback(act=SimpleCalAct.prev_m, year=next_year, month=next_month, day=1).pack()),
+        ('callback', SimpleCalendarCallback(act=SimpleCalAct.next_m, year=year, month=month, day=1).pack()),
+        ('callback', SimpleCalendarCallback(act=SimpleCalAct.day, year=next_year, month=next_month, day=15).pack()),
+    ]
+
+
+def dialog_navigation(today: date) -> list:
+    year, month = today.year, today.month
+    return [
+        ('message', '📅 Диалоговый календарь'),
+        ('callback', DialogCalendarCallback(act=DialogCalAct.next_y, year=year, month=-1, day=-1).pack()),
+        ('callback', DialogCalendarCallback(act=DialogCalAct.prev_y, year=year + 5, month=-1, day=-1).pack()),
+        ('callback', DialogCalendarCallback(act=DialogCalAct.set_y, year=year, month=-1, day=-1).pack()),
+        ('callback', DialogCalendarCallback(act=DialogCalAct.set_m, year=year, month=month, day=-1).pack()),
+        ('callback', DialogCalendarCallback(act=DialogCalAct.day, year=year, month=month, day=15).pack()),
+    ]
+
+
+def quick_dates(today: date) -> list:
+    return [('message', '⚡️ Быстрые даты'), ('message', '📌 Завтра')]
+
+
+# scenario -> (steps factory, share of users)
+SCENARIOS = {
+    'simple_navigation': (simple_navigation, 0.45),
+    'dialog_navigation': (dialog_navigation, 0.35),
+    'quick_dates': (quick_dates, 0.2),
+}
+
+
+class Session:
+    """User going through a scenario, one update at a time"""
+
+    __slots__ = ('scenario', 'user_id', 'steps', 'message_ids')
+
+    def __init__(self, scenario: str, user_id: int, steps: list) -> None:
+        self.scenario = scenario
+        self.user_id = user_id
+        self.steps = deque(steps)
+        self.message_ids = itertools.count(1)
+
+    def next_update(self) -> dict:
+        kind, value = self.steps.popleft()
+        user = {'id': self.user_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'ru'}
+        chat = {'id': self.user_id, 'type': 'private'}
+        message = {'message_id': next(self.message_ids), 'date': int(time.time()), 'chat': chat}
+        if kind == 'message':
+            return {'message': dict(message, text=value, **{'from': user})}
+        return {
+            'callback_query': {
+                'id': f'{self.user_id}:{message["message_id"]}',
+                'from': user,
+                'chat_instance': str(self.user_id),
+                'data': value,
+                'message': dict(message, text='calendar', **{'from': {'id': 1, 'is_bot': True, 'first_name': 'Bot'}}),
+            }
+        }
+
+
+class LoadGenerator:
+    """Sends updates of sessions to the fake server at rate per second and times their handling"""
+
+    def __init__(self, api: FakeBotAPI, rate: float, scenarios: dict = None, seed: int = None) -> None:
+        self.api = api
+        self.rate = rate
+        self.scenarios = scenarios or SCENARIOS
+        self._random = random.Random(seed)
+        self._user_ids = itertools.count(1000000)
+        self._ready = deque()       # sessions waiting to send their next update
+        self._pending = {}          # update_id -> (queued at, session)
+        self.latencies = defaultdict(list)     # scenario -> milliseconds
+        self.statuses = Counter()   # handled, not_handled or failed -> updates
+        self.sent = 0
+        self.last_done = None
+
+    async def __call__(self, handler, event, data):
+        """Outer update middleware of the dispatcher under test"""
+        status = 'failed'
+        try:
+            result = await handler(event, data)
+            status = 'not_handled' if result is UNHANDLED else 'handled'
+            return result
+        finally:
+            self._complete(event.update_id, status)
+
+    def _complete(self, update_id: int, status: str) -> None:
+        entry = self._pending.pop(update_id, None)
+        if entry is None:
+            return
+        queued, session = entry
+        self.last_done = time.perf_counter()
+        self.latencies[session.scenario].append((self.last_done - queued) * 1000)
+        self.statuses[status] += 1
+        if session.steps:
+            self._ready.append(session)
+
+    def _new_session(self) -> Session:
+        names = list(self.scenarios)
+        name = self._random.choices(names, [self.scenarios[name][1] for name in names])[0]
+        return Session(name, next(self._user_ids), self.scenarios[name][0](date.today()))
+
+    async def send(self, duration: float) -> None:
+        """Sends updates for duration seconds, new users join when no session is ready"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for index in itertools.count():
+            at = started + index / self.rate
+            if at - started >= duration:
+                break
+            await asyncio.sleep(max(0.0, at - loop.time()))
+            session = self._ready.popleft() if self._ready else self._new_session()
+            update_id = self.api.push_update(session.next_update())
+            self._pending[update_id] = (time.perf_counter(), session)
+            self.sent += 1
+
+    async def drain(self, timeout: float) -> None:
+        """Waits for sent updates to be handled"""
+        deadline = time.perf_counter() + timeout
+        while self._pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+
+    def report(self, started: float) -> dict:
+        def summary(values: list) -> dict:
+            values = sorted(values)
+            return {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.5), 3),
+                'p99_ms': round(percentile(values, 0.99), 3),
+                'max_ms': round(values[-1], 3) if values else 0.0,
+            }
+
+        completed = sum(self.statuses.values())
+        elapsed = (self.last_done or time.perf_counter()) - started
+        return {
+            'sent': self.sent,
+            'completed': completed,
+            'timed_out': len(self._pending),
+            'statuses': dict(self.statuses),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(completed / elapsed, 3) if elapsed > 0 else 0.0,
+            'latency': summary([value for values in self.latencies.values() for value in values]),
+            'scenarios': {name: summary(values) for name, values in sorted(self.latencies.items())},
+        }
+
+
+async def run_load(
+    dp, bot, rate: float, duration: float, api: FakeBotAPI = None, drain: float = 10.0, seed: int = None
+) -> dict:
+    """Runs dispatcher against the fake server while sending updates, returns report"""
+    api = api or FakeBotAPI(seed=seed)
+    generator = LoadGenerator(api, rate, seed=seed)
+    url = await api.start()
+    original_server = bot.session.api
+    bot.session.api = TelegramAPIServer.from_base(url)
+    dp.update.outer_middleware(generator)
+    polling = asyncio.ensure_future(
+        dp.start_polling(bot, polling_timeout=1, handle_signals=False, close_bot_session=False)
+    )
+    try:
+        started = time.perf_counter()
+        await generator.send(duration)
+        await generator.drain(drain)
+        report = generator.report(started)
+    finally:
+        if not polling.done():
+            await dp.stop_polling()
+        await polling
+        dp.update.outer_middleware.unregister(generator)
+        bot.session.api = original_server
+        await api.stop()
+    report['config'] = {
+        'rate': rate, 'duration': duration, 'latency': api.latency, 'jitter': api.jitter,
+        'rate_limit': api.rate_limit, 'retry_after': api.retry_after,
+    }
+    report['api'] = api.stats()
+    return report
+
+
+def main(args: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', default='example_bot', help='module with dp & bot of the bot under test')
+    parser.add_argument('--rate', type=float, default=20, help='updates per second')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to send updates for')
+    parser.add_argument('--drain', type=float, default=10, help='seconds to wait for sent updates after that')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds each Bot API call takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random seconds added to latency')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='share of Bot API calls failing with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after of 429 responses')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('-o', '--output', help='write JSON report to file instead of stdout')
+    parser.add_argument('-v', '--verbose', action='store_true', help='keep aiogram per-update logging')
+    options = parser.parse_args(args)
+
+    target = import_module(options.target)
+    if not options.verbose:
+        logging.getLogger('aiogram').setLevel(logging.WARNING)
+    api = FakeBotAPI(options.latency, options.jitter, options.rate_limit, options.retry_after, options.seed)
+
+    async def run() -> dict:
+        try:
+            return await run_load(
+                target.dp, target.bot, options.rate, options.duration, api, options.drain, options.seed
+            )
+        finally:
+            await target.bot.session.close()
+
+    report = asyncio.run(run())
+    output = json.dumps(report, indent=2)
+    if options.output:
+        Path(options.output).write_text(output + '\n')
+    else:
+        print(output)
+    return 1 if report['timed_out'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import logging
+import os
 import sys
 import asyncio
-from typing import Dict
+import json
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
 
-from aiogram import Bot, Dispatcher, F
+from aiogram import BaseMiddleware, Bot, Dispatcher, F
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
 from aiogram.filters import Command
 from aiogram.types import (
     KeyboardButton,
@@ -12,11 +21,13 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
-    CallbackQuery
+    CallbackQuery,
+    TelegramObject,
+    Update
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from aiogram_calendar import SimpleCalendar, DialogCalendar
+from aiogram_calendar import SimpleCalendar, DialogCalendar, ApiScheduler, CalendarMetrics, get_calendar
 from aiogram_calendar.simple_calendar import SimpleCalendarCallback
 from aiogram_calendar.dialog_calendar import DialogCalendarCallback
 
@@ -33,6 +44,187 @@ logger = logging.getLogger(__name__)
 bot = Bot(token=API_TOKEN)
 dp = Dispatcher()
 
+# Календари отправляют запросы к Bot API с учетом лимитов Telegram
+api_scheduler = ApiScheduler()
+
+# Метрики календарей отдаются в формате Prometheus, если задан METRICS_PORT
+METRICS_PORT = os.environ.get('METRICS_PORT')
+
+
+class Span(NamedTuple):
+    """Отрезок обработки апдейта, время в миллисекундах от начала апдейта"""
+    name: str
+    parent: Optional[str]
+    start_ms: float
+    duration_ms: float
+
+
+class UpdateTrace:
+    """Спаны одного апдейта"""
+
+    __slots__ = ('update_id', 'event_type', 'started_at', 'started', 'total_ms', 'handled', 'spans')
+
+    def __init__(self, update_id: int, event_type: str) -> None:
+        self.update_id = update_id
+        self.event_type = event_type
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.handled = False
+        self.spans: List[Span] = []
+
+    def add(self, name: str, parent: Optional[str], started: float, finished: float) -> None:
+        self.spans.append(Span(
+            name, parent, (started - self.started) * 1000, (finished - started) * 1000
+        ))
+
+    def as_dict(self) -> dict:
+        return {
+            'update_id': self.update_id,
+            'event_type': self.event_type,
+            'started_at': self.started_at.isoformat(),
+            'total_ms': round(self.total_ms, 3),
+            'handled': self.handled,
+            'spans': [
+                {
+                    'name': span.name, 'parent': span.parent,
+                    'start_ms': round(span.start_ms, 3), 'duration_ms': round(span.duration_ms, 3)
+                }
+                for span in self.spans
+            ],
+        }
+
+
+# трасса текущего апдейта и имя открытого спана, None если апдейт не попал в выборку
+current_trace: ContextVar[Optional[UpdateTrace]] = ContextVar('current_trace', default=None)
+current_span: ContextVar[Optional[str]] = ContextVar('current_span', default=None)
+
+
+@contextmanager
+def trace_span(name: str):
+    """Записывает время блока в трассу текущего апдейта, без трассы ничего не делает"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    parent = current_span.get()
+    token = current_span.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, parent, started, time.perf_counter())
+        current_span.reset(token)
+
+
+class UpdateTracer(BaseMiddleware):
+    """Внешний middleware апдейтов: трассирует выборку апдейтов в кольцевой буфер
+
+    Спаны: filters - от получения апдейта до прохождения фильтров хендлера, handler - хендлер целиком,
+    api.<Метод> - каждый запрос к Bot API, render - построение клавиатуры календаря,
+    и спаны хендлеров (settings, calendar, selection).
+    """
+
+    def __init__(self, maxsize: int = 1000, sample_rate: float = 1.0, slow_ms: float = None) -> None:
+        """
+        Args:
+            maxsize: сколько последних трасс хранить
+            sample_rate: доля трассируемых апдейтов от 0 до 1
+            slow_ms: трассы дольше этого пишутся в лог
+        """
+        self.traces = deque(maxlen=maxsize)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return await handler(event, data)
+        trace = UpdateTrace(event.update_id, event.event_type)
+        token = current_trace.set(trace)
+        try:
+            result = await handler(event, data)
+            trace.handled = result is not UNHANDLED
+            return result
+        finally:
+            trace.total_ms = (time.perf_counter() - trace.started) * 1000
+            current_trace.reset(token)
+            self.traces.append(trace)
+            if self.slow_ms is not None and trace.total_ms >= self.slow_ms:
+                logger.warning('Slow update %s', json.dumps(trace.as_dict(), ensure_ascii=False))
+
+    def export(self) -> List[dict]:
+        """Трассы из буфера как словари, от старых к новым"""
+        return [trace.as_dict() for trace in list(self.traces)]
+
+    def dump(self, path: str) -> int:
+        """Дописывает трассы в файл в формате JSON Lines, возвращает их количество"""
+        traces = self.export()
+        with open(path, 'a', encoding='utf-8') as file:
+            for trace in traces:
+                file.write(json.dumps(trace, ensure_ascii=False) + '\n')
+        return len(traces)
+
+
+class HandlerSpans(BaseMiddleware):
+    """Внутренний middleware событий: вызывается после фильтров, записывает спаны filters и handler"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        trace = current_trace.get()
+        if trace is None:
+            return await handler(event, data)
+        trace.add('filters', None, trace.started, time.perf_counter())
+        with trace_span('handler'):
+            return await handler(event, data)
+
+
+class ApiCallSpans(BaseRequestMiddleware):
+    """Middleware сессии бота: записывает спан на каждый запрос к Bot API"""
+
+    async def __call__(self, make_request, bot: Bot, method):
+        with trace_span(f'api.{type(method).__name__}'):
+            return await make_request(bot, method)
+
+
+# Трассировка апдейтов: TRACE_SAMPLE_RATE - доля апдейтов, TRACE_BUFFER - размер буфера,
+# TRACE_SLOW_MS - порог записи в лог, TRACE_EXPORT - файл, куда трассы пишутся при остановке
+update_tracer = UpdateTracer(
+    maxsize=int(os.environ.get('TRACE_BUFFER', 1000)),
+    sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 0.1)),
+    slow_ms=float(os.environ['TRACE_SLOW_MS']) if os.environ.get('TRACE_SLOW_MS') else None
+)
+TRACE_EXPORT = os.environ.get('TRACE_EXPORT')
+dp.update.outer_middleware(update_tracer)
+dp.message.middleware(HandlerSpans())
+dp.callback_query.middleware(HandlerSpans())
+bot.session.middleware(ApiCallSpans())
+
+
+class TracedMetrics(CalendarMetrics):
+    """Метрики календарей, которые еще и пишут построение клавиатуры спаном render
+
+    Календарь замеряет только построение клавиатуры, без ожидания лимитов и запросов к Bot API.
+    """
+
+    def observe_render(self, calendar: str, view: str, locale: str, seconds: float) -> None:
+        super().observe_render(calendar, view, locale, seconds)
+        trace = current_trace.get()
+        if trace is not None:
+            finished = time.perf_counter()
+            trace.add('render', current_span.get(), finished - seconds, finished)
+
+
+calendar_metrics = TracedMetrics()
+
 # Dictionary to store user settings
 user_settings: Dict[int, 'UserSettings'] = {}
 
@@ -455,7 +647,7 @@ async def quick_dates_handler(message: Message) -> None:
         )
         await message.answer(error_text)
 
-@dp.message(F.text == "📌 Today", F.text == "📌 Сегодня")
+@dp.message(F.text.in_(["📌 Today", "📌 Сегодня"]))
 async def today_handler(message: Message) -> None:
     """Обработчик выбора сегодняшней даты"""
     try:
@@ -469,11 +661,11 @@ async def today_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике сегодняшней даты: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 Tomorrow", F.text == "📌 Завтра")
+@dp.message(F.text.in_(["📌 Tomorrow", "📌 Завтра"]))
 async def tomorrow_handler(message: Message) -> None:
     """Обработчик выбора завтрашней даты"""
     try:
-        tomorrow = datetime.now() + datetime.timedelta(days=1)
+        tomorrow = datetime.now() + timedelta(days=1)
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(tomorrow)}\n\n"
             f"📝 Можете выбрать другую дату или вернуться в главное меню",
@@ -483,11 +675,11 @@ async def tomorrow_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике завтрашней даты: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 Next Week", F.text == "📌 Через неделю")
+@dp.message(F.text.in_(["📌 Next Week", "📌 Через неделю"]))
 async def next_week_handler(message: Message) -> None:
     """Обработчик выбора даты через неделю"""
     try:
-        next_week = datetime.now() + datetime.timedelta(days=7)
+        next_week = datetime.now() + timedelta(days=7)
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(next_week)}\n\n"
             f"📝 Можете выбрать другую дату или вернуться в главное меню",
@@ -497,11 +689,11 @@ async def next_week_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике даты через неделю: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 In 2 Weeks", F.text == "📌 Через 2 недели")
+@dp.message(F.text.in_(["📌 In 2 Weeks", "📌 Через 2 недели"]))
 async def two_weeks_handler(message: Message) -> None:
     """Обработчик выбора даты через 2 недели"""
     try:
-        two_weeks = datetime.now() + datetime.timedelta(days=14)
+        two_weeks = datetime.now() + timedelta(days=14)
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(two_weeks)}\n\n"
             f"📝 Можете выбрать другую дату или вернуться в главное меню",
@@ -511,11 +703,11 @@ async def two_weeks_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике даты через 2 недели: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 Next Month", F.text == "📌 Через месяц")
+@dp.message(F.text.in_(["📌 Next Month", "📌 Через месяц"]))
 async def next_month_handler(message: Message) -> None:
     """Обработчик выбора даты через месяц"""
     try:
-        next_month = datetime.now() + datetime.timedelta(days=30)
+        next_month = datetime.now() + timedelta(days=30)
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(next_month)}\n\n"
             f"📝 Можете выбрать другую дату или вернуться в главное меню",
@@ -525,11 +717,11 @@ async def next_month_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике даты через месяц: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 In 3 Months", F.text == "📌 Через 3 месяца")
+@dp.message(F.text.in_(["📌 In 3 Months", "📌 Через 3 месяца"]))
 async def three_months_handler(message: Message) -> None:
     """Обработчик выбора даты через 3 месяца"""
     try:
-        three_months = datetime.now() + datetime.timedelta(days=90)
+        three_months = datetime.now() + timedelta(days=90)
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(three_months)}\n\n"
             f"📝 Можете выбрать другую дату или вернуться в главное меню",
@@ -539,7 +731,7 @@ async def three_months_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике даты через 3 месяца: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 Start of Month", F.text == "📌 Начало месяца")
+@dp.message(F.text.in_(["📌 Start of Month", "📌 Начало месяца"]))
 async def start_of_month_handler(message: Message) -> None:
     """Обработчик выбора начала текущего месяца"""
     try:
@@ -554,7 +746,7 @@ async def start_of_month_handler(message: Message) -> None:
         logger.error(f"Ошибка в обработчике начала месяца: {e}")
         await message.answer("❌ Произошла ошибка. Пожалуйста, попробуйте позже.")
 
-@dp.message(F.text == "📌 End of Month", F.text == "📌 Конец месяца")
+@dp.message(F.text.in_(["📌 End of Month", "📌 Конец месяца"]))
 async def end_of_month_handler(message: Message) -> None:
     """Обработчик выбора конца текущего месяца"""
     try:
@@ -563,7 +755,7 @@ async def end_of_month_handler(message: Message) -> None:
         if today.month == 12:
             last_day = today.replace(day=31)
         else:
-            last_day = today.replace(month=today.month + 1, day=1) - datetime.timedelta(days=1)
+            last_day = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
         
         await message.answer(
             f"✅ Выбрана дата:\n\n{QuickDates.get_date_description(last_day)}\n\n"
@@ -783,25 +975,22 @@ async def process_back_to_settings(callback_query: CallbackQuery):
 async def nav_cal_handler(message: Message) -> None:
     """Обработчик простого календаря"""
     try:
-        user_id = message.from_user.id
-        if user_id not in user_settings:
-            user_settings[user_id] = UserSettings()
-        
-        user_lang = user_settings[user_id].language
+        with trace_span('settings'):
+            user_id = message.from_user.id
+            if user_id not in user_settings:
+                user_settings[user_id] = UserSettings()
+            user_lang = user_settings[user_id].language
         calendar_text = (
             "📅 Simple Calendar\nSelect a date:" if user_lang == 'en'
             else "📅 Простой календарь\nВыберите дату:"
         )
         
-        # Создаем календарь с указанным языком и кнопками
-        calendar = SimpleCalendar(
-            locale=user_lang,
-            show_alerts=True
-        )
-        await message.answer(
-            calendar_text,
-            reply_markup=await calendar.start_calendar()
-        )
+        # Берем общий календарь с указанным языком и кнопками
+        with trace_span('calendar'):
+            calendar = get_calendar(
+                SimpleCalendar, locale=user_lang, show_alerts=True, scheduler=api_scheduler, metrics=calendar_metrics
+            )
+        await message.answer(calendar_text, reply_markup=await calendar.start_calendar())
     except Exception as e:
         logger.error(f"Ошибка в обработчике простого календаря: {e}")
         error_text = (
@@ -814,25 +1003,22 @@ async def nav_cal_handler(message: Message) -> None:
 async def dialog_cal_handler(message: Message) -> None:
     """Обработчик диалогового календаря"""
     try:
-        user_id = message.from_user.id
-        if user_id not in user_settings:
-            user_settings[user_id] = UserSettings()
-        
-        user_lang = user_settings[user_id].language
+        with trace_span('settings'):
+            user_id = message.from_user.id
+            if user_id not in user_settings:
+                user_settings[user_id] = UserSettings()
+            user_lang = user_settings[user_id].language
         calendar_text = (
             "📅 Dialog Calendar\nSelect a year:" if user_lang == 'en'
             else "📅 Диалоговый календарь\nВыберите год:"
         )
         
-        # Создаем календарь с указанным языком и кнопками
-        calendar = DialogCalendar(
-            locale=user_lang,
-            show_alerts=True
-        )
-        await message.answer(
-            calendar_text,
-            reply_markup=await calendar.start_calendar()
-        )
+        # Берем общий календарь с указанным языком и кнопками
+        with trace_span('calendar'):
+            calendar = get_calendar(
+                DialogCalendar, locale=user_lang, show_alerts=True, scheduler=api_scheduler, metrics=calendar_metrics
+            )
+        await message.answer(calendar_text, reply_markup=await calendar.start_calendar())
     except Exception as e:
         logger.error(f"Ошибка в обработчике диалогового календаря: {e}")
         error_text = (
@@ -845,17 +1031,19 @@ async def dialog_cal_handler(message: Message) -> None:
 async def process_simple_calendar(callback_query: CallbackQuery, callback_data: dict):
     """Обработчик простого календаря"""
     try:
-        user_id = callback_query.from_user.id
-        if user_id not in user_settings:
-            user_settings[user_id] = UserSettings()
-        
-        user_lang = user_settings[user_id].language
-        # Создаем календарь с указанным языком и кнопками
-        calendar = SimpleCalendar(
-            locale=user_lang,
-            show_alerts=True
-        )
-        selected, date = await calendar.process_selection(callback_query, callback_data)
+        with trace_span('settings'):
+            user_id = callback_query.from_user.id
+            if user_id not in user_settings:
+                user_settings[user_id] = UserSettings()
+            user_lang = user_settings[user_id].language
+        # Берем общий календарь с указанным языком и кнопками
+        with trace_span('calendar'):
+            calendar = get_calendar(
+                SimpleCalendar, locale=user_lang, show_alerts=True, scheduler=api_scheduler, metrics=calendar_metrics
+            )
+        # выбор целиком: построение клавиатуры (render), ожидание лимитов и запросы к Bot API (api.*)
+        with trace_span('selection'):
+            selected, date = await calendar.process_selection(callback_query, callback_data)
         
         if selected:
             date_format = user_settings[user_id].date_format
@@ -877,17 +1065,19 @@ async def process_simple_calendar(callback_query: CallbackQuery, callback_data:
 async def process_dialog_calendar(callback_query: CallbackQuery, callback_data: dict):
     """Обработчик диалогового календаря"""
     try:
-        user_id = callback_query.from_user.id
-        if user_id not in user_settings:
-            user_settings[user_id] = UserSettings()
-        
-        user_lang = user_settings[user_id].language
-        # Создаем календарь с указанным языком и кнопками
-        calendar = DialogCalendar(
-            locale=user_lang,
-            show_alerts=True
-        )
-        selected, date = await calendar.process_selection(callback_query, callback_data)
+        with trace_span('settings'):
+            user_id = callback_query.from_user.id
+            if user_id not in user_settings:
+                user_settings[user_id] = UserSettings()
+            user_lang = user_settings[user_id].language
+        # Берем общий календарь с указанным языком и кнопками
+        with trace_span('calendar'):
+            calendar = get_calendar(
+                DialogCalendar, locale=user_lang, show_alerts=True, scheduler=api_scheduler, metrics=calendar_metrics
+            )
+        # выбор целиком: построение клавиатуры (render), ожидание лимитов и запросы к Bot API (api.*)
+        with trace_span('selection'):
+            selected, date = await calendar.process_selection(callback_query, callback_data)
         
         if selected:
             date_format = user_settings[user_id].date_format
@@ -910,11 +1100,17 @@ async def main() -> None:
     Основная функция запуска бота
     """
     try:
+        if METRICS_PORT:
+            # только локальный адрес, метрики не должны быть доступны извне
+            await calendar_metrics.serve('127.0.0.1', int(METRICS_PORT))
         # Запуск процесса обработки событий
         await dp.start_polling(bot)
     except Exception as e:
         logger.critical(f"Критическая ошибка при запуске бота: {e}")
         sys.exit(1)
+    finally:
+        if TRACE_EXPORT:
+            logger.info(f"Трассы апдейтов сохранены: {update_tracer.dump(TRACE_EXPORT)}")
 
 if __name__ == "__main__":
     asyncio.run(main())